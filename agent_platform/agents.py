@@ -1,14 +1,24 @@
-from typing import Any, Dict, List
-from .memory import ConversationMemory
+from typing import Any, Dict, List, Optional
+from .memory import make_memory
+from .registries import AgentSpec
+from .runtime import ToolRuntime, default_runtime
 from .schemas import RefiAlert, LoanInfo, RateInfo
-from . import tools
+from .batches import LoanBatch
+from .tools import RateCurve
 from .utils import now_ms
 
 class AgentBase:
-    def __init__(self, id: str, tools_allowed: List[str], memory_turns: int = 6):
+    def __init__(self, id: str, tools_allowed: List[str], memory_turns: int = 6, runtime: Optional[ToolRuntime] = None,
+                 memory_sample: float = 1.0, memory_spill: Optional[str] = None):
         self.id = id
         self.tools_allowed = set(tools_allowed)
-        self.memory = ConversationMemory(max_turns=memory_turns)
+        self.memory = make_memory(memory_turns, memory_sample, memory_spill)
+        # only allowlisted tools are reachable; resolved once per agent
+        self.toolbox = (runtime or default_runtime()).bind(self.tools_allowed, owner=id)
+
+    @classmethod
+    def from_spec(cls, spec: AgentSpec, runtime: Optional[ToolRuntime] = None) -> 'AgentBase':
+        return cls(spec.id, spec.tools, spec.memory_turns, runtime, spec.memory_sample, spec.memory_spill)
 
     def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         raise NotImplementedError
@@ -21,34 +31,38 @@ class AgentBase:
 # --- Use Case C agents (Refi) ---
 class RateRetrieverAgent(AgentBase):
     def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        rates: List[RateInfo] = payload['rates']
-        # pick best available rate for matching term (or lowest overall as fallback)
-        if 'term_months' in payload and payload['term_months']:
-            tm = payload['term_months']
-            term_rates = [r.rate for r in rates if r.term_months == tm]
-            market_rate = min(term_rates) if term_rates else min(r.rate for r in rates)
-        else:
-            market_rate = min(r.rate for r in rates)
-        self.memory.add('system', f'Selected market rate {market_rate:.4f}')
+        rates = payload['rates']
+        # best rate for the term (interpolated if the term isn't quoted), or lowest overall
+        curve = rates if isinstance(rates, RateCurve) else RateCurve.from_rates(rates)
+        market_rate = curve.market_rate(payload.get('term_months'), payload.get('as_of'))
+        self.memory.add('system', 'Selected market rate {:.4f}', market_rate)
         return {'market_rate': market_rate}
 
 class SavingsCalculatorAgent(AgentBase):
     def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         loans: List[LoanInfo] = payload['loans']
         market_rate: float = payload['market_rate']
-        out = []
-        for loan in loans:
-            savings = tools.calculate_savings(loan, market_rate)
-            out.append({'borrower_id': loan.borrower_id, 'current_rate': loan.current_rate, 'market_rate': market_rate, 'monthly_savings': savings})
-        self.memory.add('system', f'Computed savings for {len(out)} loans')
+        if isinstance(loans, LoanBatch):
+            ids, current_rates = loans.borrower_id.tolist(), loans.current_rate.tolist()
+            balances, terms = loans.loan_balance, loans.remaining_term_months
+        else:
+            ids, current_rates = [l.borrower_id for l in loans], [l.current_rate for l in loans]
+            balances, terms = [l.loan_balance for l in loans], [l.remaining_term_months for l in loans]
+        savings = self.toolbox.calculate_savings_batch(balances, current_rates, terms, market_rate)
+        out = [
+            {'borrower_id': b, 'current_rate': cr, 'market_rate': market_rate, 'monthly_savings': s}
+            for b, cr, s in zip(ids, current_rates, savings.tolist())
+        ]
+        self.memory.add('system', 'Computed savings for {} loans', len(out))
         return {'savings': out}
 
 class AlertAgent(AgentBase):
     def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         threshold = payload.get('threshold', 150.0)
+        should_alert = self.toolbox.should_alert
         results = []
         for row in payload['savings']:
-            alert = tools.should_alert(row['monthly_savings'], threshold)
+            alert = should_alert(row['monthly_savings'], threshold)
             results.append(RefiAlert(
                 borrower_id=row['borrower_id'],
                 current_rate=row['current_rate'],
@@ -57,5 +71,6 @@ class AlertAgent(AgentBase):
                 refi_alert='Yes' if alert else 'No',
                 notes=[] if alert else ['Below savings threshold']
             ))
-        self.memory.add('system', f'Alert flagged for {sum(1 for r in results if r.refi_alert=="Yes")} borrowers')
+        if self.memory.enabled:
+            self.memory.add('system', 'Alert flagged for {} borrowers', sum(1 for r in results if r.refi_alert == 'Yes'))
         return {'alerts': results}
@@ -0,0 +1,100 @@
+import sqlite3, threading
+from typing import Any, Dict, List, Optional, Union
+from .schemas import Transaction
+from .batches import TransactionBatch
+from .tools import transaction_columns, insights_from_groups
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tx (
+    id TEXT PRIMARY KEY, account_id TEXT, category TEXT, merchant TEXT, spend REAL
+);
+CREATE TABLE IF NOT EXISTS agg_category (
+    account_id TEXT, category TEXT, total_spend REAL, n INTEGER,
+    PRIMARY KEY (account_id, category)
+);
+CREATE TABLE IF NOT EXISTS agg_merchant (
+    account_id TEXT, merchant TEXT, total_spend REAL, hits INTEGER,
+    PRIMARY KEY (account_id, merchant)
+);
+"""
+
+# sign = -1 retracts the stored version of changed ids, +1 applies the incoming one
+_APPLY_CATEGORY = """
+INSERT INTO agg_category (account_id, category, total_spend, n)
+SELECT account_id, category, ? * SUM(spend), ? * COUNT(*) FROM {src} WHERE true GROUP BY account_id, category
+ON CONFLICT (account_id, category) DO UPDATE SET
+    total_spend = total_spend + excluded.total_spend, n = n + excluded.n
+"""
+_APPLY_MERCHANT = """
+INSERT INTO agg_merchant (account_id, merchant, total_spend, hits)
+SELECT account_id, merchant, ? * SUM(spend), ? * COUNT(*) FROM {src} WHERE true GROUP BY account_id, merchant
+ON CONFLICT (account_id, merchant) DO UPDATE SET
+    total_spend = total_spend + excluded.total_spend, hits = hits + excluded.hits
+"""
+_PREVIOUS = "(SELECT tx.* FROM tx JOIN incoming USING (id))"
+
+class InsightStore:
+    """Persisted per-account category/merchant aggregates for budget insights.
+
+    apply() upserts transactions keyed on Transaction.id: unchanged ids are
+    ignored, changed ids have their previous contribution retracted, so
+    re-applying the same statement is idempotent. insights() answers from the
+    aggregate tables only, independent of the length of the history.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        self._con.executescript(SCHEMA)
+        self._con.execute(
+            "CREATE TEMP TABLE incoming (id TEXT PRIMARY KEY, account_id TEXT, category TEXT, merchant TEXT, spend REAL)"
+        )
+
+    def apply(self, transactions: Union[List[Transaction], TransactionBatch]) -> int:
+        if not transactions:
+            return 0
+        cols = transaction_columns(transactions)
+        if isinstance(transactions, TransactionBatch):
+            ids, accounts = transactions.id.tolist(), transactions.account_id.tolist()
+        else:
+            ids, accounts = [t.id for t in transactions], [t.account_id for t in transactions]
+        rows = zip(ids, accounts, cols['category'].tolist(), cols['merchant'].tolist(), cols['spend'].tolist())
+        with self._lock, self._con as con:
+            con.execute("DELETE FROM incoming")
+            con.executemany("INSERT OR REPLACE INTO incoming VALUES (?, ?, ?, ?, ?)", rows)
+            con.execute("""
+                DELETE FROM incoming WHERE EXISTS (
+                    SELECT 1 FROM tx WHERE tx.id = incoming.id AND tx.account_id IS incoming.account_id
+                    AND tx.category IS incoming.category AND tx.merchant IS incoming.merchant AND tx.spend = incoming.spend
+                )
+            """)
+            changed = con.execute("SELECT COUNT(*) FROM incoming").fetchone()[0]
+            if not changed:
+                return 0
+            for sql in (_APPLY_CATEGORY, _APPLY_MERCHANT):
+                con.execute(sql.format(src=_PREVIOUS), (-1, -1))
+                con.execute(sql.format(src='incoming'), (1, 1))
+            con.execute("""
+                INSERT INTO tx SELECT * FROM incoming WHERE true
+                ON CONFLICT (id) DO UPDATE SET account_id = excluded.account_id, category = excluded.category,
+                    merchant = excluded.merchant, spend = excluded.spend
+            """)
+            con.execute("DELETE FROM agg_category WHERE n = 0")
+            con.execute("DELETE FROM agg_merchant WHERE hits = 0")
+        return changed
+
+    def insights(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+        where, args = ("WHERE account_id = ?", (account_id,)) if account_id is not None else ("", ())
+        with self._lock:
+            cats = self._con.execute(
+                f"SELECT category, SUM(total_spend), SUM(n) FROM agg_category {where} GROUP BY category", args
+            ).fetchall()
+            merchants = self._con.execute(
+                f"SELECT merchant, SUM(total_spend), SUM(hits) FROM agg_merchant {where} GROUP BY merchant", args
+            ).fetchall()
+        rows = [(0, c, None, s, n) for c, s, n in cats] + [(1, None, m, s, n) for m, s, n in merchants]
+        return insights_from_groups(rows)
+
+    def close(self):
+        with self._lock:
+            self._con.close()
@@ -0,0 +1,223 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from pydantic import TypeAdapter, ValidationError
+from .schemas import Transaction, BorrowerProfile, LoanInfo, RateInfo
+
+STR, DICT, FLOAT, INT = 'str', 'dict', 'float', 'int'
+
+class DictColumn:
+    """Dictionary-encoded string column: int32 codes into `values`, -1 for None."""
+    __slots__ = ('codes', 'values')
+
+    def __init__(self, codes: np.ndarray, values: List[str]):
+        self.codes = codes
+        self.values = values
+
+    @classmethod
+    def encode(cls, items: Iterable[Optional[str]]) -> 'DictColumn':
+        index: Dict[str, int] = {}
+        codes = np.fromiter((-1 if v is None else index.setdefault(v, len(index)) for v in items), dtype=np.int32)
+        return cls(codes, list(index))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, key) -> 'DictColumn':
+        # slices share the codes buffer; the dictionary is always shared
+        return DictColumn(self.codes[key], self.values)
+
+    def code_of(self, value: str) -> int:
+        try:
+            return self.values.index(value)
+        except ValueError:
+            return -2  # matches no row
+
+    def decode(self, missing: Any = None) -> np.ndarray:
+        lookup = np.array(self.values + [missing], dtype=object)
+        return lookup[self.codes]
+
+    def tolist(self) -> list:
+        return self.decode().tolist()
+
+    def fill(self, mask: np.ndarray, items: Iterable[str]) -> 'DictColumn':
+        # new column with rows selected by mask set to items (dictionary grows as needed)
+        values = list(self.values)
+        index = {v: i for i, v in enumerate(values)}
+        codes = self.codes.copy()
+        codes[mask] = np.fromiter((index.setdefault(v, len(index)) for v in items), dtype=np.int32)
+        values.extend(list(index)[len(values):])
+        return DictColumn(codes, values)
+
+class StrColumn:
+    """Non-null strings as int64 offsets (n + 1 of them) into a UTF-8 byte buffer.
+
+    This is how the column cache stores and maps free-text columns. Slices
+    share both buffers; any other index decodes the selected rows into an
+    object array.
+    """
+    __slots__ = ('offsets', 'blob')
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                return StrColumn(self.offsets[start:max(start, stop) + 1], self.blob)
+        idx = np.arange(len(self))[key]
+        if np.ndim(idx) == 0:
+            return bytes(self.blob[self.offsets[idx]:self.offsets[idx + 1]]).decode('utf-8')
+        out = np.empty(len(idx), dtype=object)
+        if not len(idx):
+            return out
+        starts, ends = self.offsets[idx], self.offsets[idx + 1]
+        # one copy of the covering byte range; per-row slices of a memmap are slow
+        lo = int(starts.min())
+        data = bytes(self.blob[lo:int(ends.max())])
+        out[:] = [data[s:e].decode('utf-8') for s, e in zip((starts - lo).tolist(), (ends - lo).tolist())]
+        return out
+
+    def tolist(self) -> list:
+        lo, hi = int(self.offsets[0]), int(self.offsets[-1])
+        data = bytes(self.blob[lo:hi])
+        rel = (self.offsets - lo).tolist()
+        return [data[s:e].decode('utf-8') for s, e in zip(rel[:-1], rel[1:])]
+
+    def decode(self) -> np.ndarray:
+        out = np.empty(len(self), dtype=object)
+        out[:] = self.tolist()
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + int(self.offsets[-1] - self.offsets[0])
+
+def _invalid(cls, name: str, reason: str) -> ValueError:
+    return ValueError(f"invalid {cls.MODEL.__name__} batch: field {name} {reason}")
+
+_NUMBERS = (int, float)
+
+@lru_cache(maxsize=None)
+def _field_adapter(model: type, name: str) -> TypeAdapter:
+    return TypeAdapter(List[model.model_fields[name].annotation])
+
+def _coerce(cls, name: str, values: list, reason: str) -> list:
+    # bytes, numeric strings, bools, ...: coerce or reject exactly as the model would
+    try:
+        return _field_adapter(cls.MODEL, name).validate_python(values)
+    except ValidationError:
+        raise _invalid(cls, name, reason)
+
+def _build_column(cls, name: str, kind: str, values: list, nullable: bool):
+    if kind in (STR, DICT):
+        ok = (str, type(None)) if nullable else str
+        if not all(isinstance(v, ok) for v in values):
+            values = _coerce(cls, name, values, 'must be a string')
+        return DictColumn.encode(values) if kind == DICT else np.array(values, dtype=object)
+    if None in values:
+        raise _invalid(cls, name, 'must not be null')
+    if not all(type(v) in _NUMBERS for v in values):
+        values = _coerce(cls, name, values, 'must be numeric')
+    arr = np.asarray(values, dtype=np.float64)
+    if kind == INT:
+        if not (np.all(np.isfinite(arr)) and np.all(np.mod(arr, 1) == 0)):
+            raise _invalid(cls, name, 'must be an integer')
+        return arr.astype(np.int64)
+    return arr
+
+class ColumnBatch:
+    """Columnar batch of MODEL records; validated once per batch.
+
+    Columns are NumPy arrays (or DictColumn for repetitive strings) and are
+    available as attributes. Slicing returns a batch of views; pydantic models
+    are only materialized by to_models() at the API boundary.
+    """
+    MODEL: type = None
+    FIELDS: Dict[str, str] = {}
+
+    def __init__(self, columns: Dict[str, Any]):
+        self.columns = columns
+
+    def __getattr__(self, name: str):
+        try:
+            return self.__dict__['columns'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, key) -> 'ColumnBatch':
+        return type(self)({k: c[key] for k, c in self.columns.items()})
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[dict]) -> 'ColumnBatch':
+        columns = {}
+        for name, kind in cls.FIELDS.items():
+            field = cls.MODEL.model_fields[name]
+            try:
+                if field.is_required():
+                    values = [r[name] for r in rows]
+                else:
+                    default = field.get_default(call_default_factory=True)
+                    values = [r.get(name, default) for r in rows]
+            except KeyError:
+                raise _invalid(cls, name, 'is required')
+            nullable = not field.is_required() and field.default is None
+            columns[name] = _build_column(cls, name, kind, values, nullable)
+        return cls(columns)
+
+    @classmethod
+    def from_models(cls, models: Sequence[Any]) -> 'ColumnBatch':
+        # models are already validated; build columns without re-checking
+        columns = {}
+        for name, kind in cls.FIELDS.items():
+            values = [getattr(m, name) for m in models]
+            if kind == DICT:
+                columns[name] = DictColumn.encode(values)
+            elif kind == STR:
+                columns[name] = np.array(values, dtype=object)
+            else:
+                columns[name] = np.asarray(values, dtype=np.int64 if kind == INT else np.float64)
+        return cls(columns)
+
+    def to_models(self) -> list:
+        names = list(self.FIELDS)
+        construct = self.MODEL.model_construct
+        cols = [self.columns[n].tolist() for n in names]
+        return [construct(**dict(zip(names, vals))) for vals in zip(*cols)]
+
+    def nbytes(self) -> int:
+        total = 0
+        for c in self.columns.values():
+            total += c.codes.nbytes if isinstance(c, DictColumn) else c.nbytes
+        return total
+
+class TransactionBatch(ColumnBatch):
+    MODEL = Transaction
+    FIELDS = {
+        'id': STR, 'date': DICT, 'description': STR, 'merchant': DICT,
+        'amount': FLOAT, 'type': DICT, 'account_id': DICT, 'category': DICT,
+    }
+
+class LoanBatch(ColumnBatch):
+    MODEL = LoanInfo
+    FIELDS = {'borrower_id': STR, 'loan_balance': FLOAT, 'current_rate': FLOAT, 'remaining_term_months': INT}
+
+class RateBatch(ColumnBatch):
+    MODEL = RateInfo
+    FIELDS = {'date': DICT, 'term_months': INT, 'rate': FLOAT}
+
+class BorrowerBatch(ColumnBatch):
+    MODEL = BorrowerProfile
+    FIELDS = {
+        'borrower_id': STR, 'income_monthly': FLOAT, 'debts_monthly': FLOAT, 'fico': INT,
+        'home_price': FLOAT, 'down_payment': FLOAT, 'interest_rate': FLOAT,
+        'prop_tax_monthly': FLOAT, 'insurance_monthly': FLOAT,
+    }
@@ -0,0 +1,159 @@
+import asyncio, importlib, json, os
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LANGGRAPH_CONFIG = os.path.join(ROOT, 'langgraph.json')
+
+BatchHandler = Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+
+class BatchStats:
+    """Batch sizes and queue depth (requests in flight when a batch is cut), last `window` batches."""
+    def __init__(self, window: int = 4096):
+        self.requests = self.batches = self.errors = 0
+        self.sizes: deque = deque(maxlen=window)
+        self.depths: deque = deque(maxlen=window)
+
+    def record(self, size: int, depth: int):
+        self.requests += size
+        self.batches += 1
+        self.sizes.append(size)
+        self.depths.append(depth)
+
+    def snapshot(self) -> Dict[str, Any]:
+        sizes, depths = sorted(self.sizes), list(self.depths)
+        return {
+            'requests': self.requests, 'batches': self.batches, 'errors': self.errors,
+            'mean_batch_size': round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            'p50_batch_size': sizes[len(sizes) // 2] if sizes else 0,
+            'max_batch_size': sizes[-1] if sizes else 0,
+            'mean_queue_depth': round(sum(depths) / len(depths), 2) if depths else 0.0,
+            'max_queue_depth': max(depths) if depths else 0,
+        }
+
+def sequential(graph) -> BatchHandler:
+    """Handler that invokes a compiled graph (or LocalGraph) once per state."""
+    return lambda states: [graph.invoke(s) for s in states]
+
+class MicroBatcher:
+    """Collects concurrent submit() calls into one handler call.
+
+    A batch is cut `window_ms` after its first request arrives, or as soon as
+    `max_batch` requests are waiting. The handler maps a list of states to a
+    list of results in the same order; if it raises, every caller in that
+    batch gets the exception. With offload=True the handler runs on the
+    loop's default thread pool so the loop keeps accepting requests.
+    """
+    def __init__(self, handler: BatchHandler, max_batch: int = 64, window_ms: float = 2.0, offload: bool = False):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self.offload = offload
+        self.stats = BatchStats()
+        self._pending: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self._in_flight = 0
+
+    async def submit(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((state, fut))
+        self._in_flight += 1
+        try:
+            if len(self._pending) >= self.max_batch:
+                self._cut(loop)
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._cut, loop)
+            return await fut
+        finally:
+            self._in_flight -= 1
+
+    def _cut(self, loop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            self.stats.record(len(batch), self._in_flight)
+            if self.offload:
+                task = loop.create_task(self._dispatch_offloaded(loop, batch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                self._dispatch(batch)
+
+    def _dispatch(self, batch: List[tuple]):
+        try:
+            self._scatter(batch, self.handler([s for s, _ in batch]))
+        except Exception as e:
+            self._fail(batch, e)
+
+    async def _dispatch_offloaded(self, loop, batch: List[tuple]):
+        try:
+            self._scatter(batch, await loop.run_in_executor(None, self.handler, [s for s, _ in batch]))
+        except Exception as e:
+            self._fail(batch, e)
+
+    def _scatter(self, batch: List[tuple], results: List[Dict[str, Any]]):
+        if len(results) != len(batch):
+            raise RuntimeError(f"batch handler returned {len(results)} results for {len(batch)} requests")
+        for (_, fut), res in zip(batch, results):
+            if not fut.done():  # caller may have been cancelled
+                fut.set_result(res)
+
+    def _fail(self, batch: List[tuple], e: Exception):
+        self.stats.errors += 1
+        for _, fut in batch:
+            if not fut.done():
+                fut.set_exception(e)
+
+    async def aclose(self):
+        # flush whatever is still waiting, then wait for offloaded batches
+        if self._pending:
+            self._cut(asyncio.get_running_loop())
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+def _graph_module(ref: str, root: str):
+    # "./usecases/x/api.py:build_graph" -> (usecases.x.api module, 'build_graph')
+    path, _, attr = ref.partition(':')
+    rel = os.path.relpath(os.path.join(root, path), root)
+    return importlib.import_module(os.path.splitext(rel)[0].replace(os.sep, '.')), attr or 'build_graph'
+
+class GraphFrontend:
+    """One MicroBatcher per graph name; ainvoke() is the async entry point.
+
+    from_config() reads langgraph.json and uses each graph module's
+    batch_invoke (vectorized across requests) when it has one, falling back
+    to invoking the compiled graph once per request.
+    """
+    def __init__(self, handlers: Dict[str, BatchHandler], max_batch: int = 64,
+                 window_ms: float = 2.0, offload: bool = False):
+        self.batchers = {name: MicroBatcher(h, max_batch, window_ms, offload) for name, h in handlers.items()}
+
+    @classmethod
+    def from_config(cls, path: str = LANGGRAPH_CONFIG, **kwargs) -> 'GraphFrontend':
+        with open(path, 'r', encoding='utf-8') as f:
+            graphs = json.load(f).get('graphs', {})
+        root = os.path.dirname(os.path.abspath(path))
+        handlers = {}
+        for name, ref in graphs.items():
+            module, attr = _graph_module(ref, root)
+            handler = getattr(module, 'batch_invoke', None)
+            handlers[name] = handler if handler is not None else sequential(getattr(module, attr)())
+        return cls(handlers, **kwargs)
+
+    async def ainvoke(self, graph: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            batcher = self.batchers[graph]
+        except KeyError:
+            raise KeyError(f"unknown graph {graph}")
+        return await batcher.submit(state)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: b.stats.snapshot() for name, b in self.batchers.items()}
+
+    async def aclose(self):
+        for b in self.batchers.values():
+            await b.aclose()
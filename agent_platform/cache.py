@@ -0,0 +1,279 @@
+import hashlib, json, os, pickle, threading, time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+import numpy as np
+from pydantic import BaseModel
+from .batches import ColumnBatch, DictColumn, StrColumn
+from .utils import MISSING, temp_path
+
+class LRUCache:
+    """Thread-safe LRU with an optional per-entry TTL in seconds."""
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __getstate__(self):
+        # a copy sent to another process starts empty with its own lock
+        return {'maxsize': self.maxsize, 'ttl': self.ttl}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses,
+            'evictions': self.evictions, 'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# ---- content-addressed results ----
+
+# Graph results are keyed on sha256(version, canonical payload). The version
+# covers the code and tables a result depends on, so editing a tool or
+# MERCHANT_MAP invalidates old entries instead of serving them.
+RESULT_CACHE_ENV = 'AGENT_PLATFORM_RESULT_CACHE'
+
+def _canon(o: Any) -> Any:
+    # json.dumps default: a stable, type-tagged form of the values payloads carry
+    if isinstance(o, BaseModel):
+        return [type(o).__name__, o.model_dump(mode='json')]
+    if isinstance(o, ColumnBatch):
+        return [type(o).__name__, o.columns]
+    if isinstance(o, DictColumn):
+        return ['DictColumn', o.values, o.codes]
+    if isinstance(o, StrColumn):  # same form as an object array of the same strings
+        return ['ndarray', 'O', o.tolist()]
+    if isinstance(o, np.ndarray):
+        if o.dtype == object:
+            return ['ndarray', 'O', o.tolist()]
+        return ['ndarray', o.dtype.str, o.shape, hashlib.sha256(np.ascontiguousarray(o).tobytes()).hexdigest()]
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, (set, frozenset)):
+        return sorted(o)
+    raise TypeError(f"cannot hash {type(o).__name__} values")
+
+def stable_hash(obj: Any) -> str:
+    """sha256 of a canonical encoding of obj (dict key order does not matter)."""
+    text = json.dumps(obj, sort_keys=True, separators=(',', ':'), default=_canon)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def code_version(modules: Sequence = (), **data) -> str:
+    # source files of the modules plus any tables (MERCHANT_MAP, thresholds) passed as data
+    h = hashlib.sha256()
+    for m in modules:
+        with open(m.__file__, 'rb') as f:
+            h.update(f.read())
+    h.update(stable_hash(data).encode('utf-8'))
+    return h.hexdigest()[:16]
+
+def _check_private(directory: str):
+    if not hasattr(os, 'getuid'):  # no POSIX ownership to check
+        return
+    st = os.stat(directory)
+    if st.st_uid != os.getuid() or st.st_mode & 0o022:
+        raise ValueError(f"result cache directory {directory} must be owned by the current user and "
+                         f"not writable by group or others; cached results are unpickled")
+
+class DiskCache:
+    """Pickled values as one file per key under directory, evicted oldest-used first past max_bytes.
+
+    Reads bump the file's mtime, so eviction order is least recently used.
+    Several processes may share a directory; writes are atomic renames.
+
+    Hits are unpickled, so anyone who can write to the directory can run
+    code in every process that reads it. The directory is created private
+    (0700), and an existing one is refused unless it belongs to the current
+    user and is not group- or world-writable.
+    """
+    def __init__(self, directory: str, max_bytes: int = 256 << 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.evictions = 0
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        _check_private(directory)
+        self._bytes = sum(size for _, _, size in self._files())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _files(self) -> List[tuple]:
+        out = []
+        for sub in os.listdir(self.directory):
+            d = os.path.join(self.directory, sub)
+            if not os.path.isdir(d):
+                continue
+            for name in os.listdir(d):
+                if name.endswith('.tmp'):
+                    continue
+                try:
+                    st = os.stat(os.path.join(d, name))
+                except OSError:  # evicted by another process
+                    continue
+                out.append((st.st_mtime_ns, os.path.join(d, name), st.st_size))
+        return out
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = temp_path(path)
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        try:
+            old = os.stat(path).st_size  # overwriting a key replaces its bytes
+        except OSError:
+            old = 0
+        os.replace(tmp, path)
+        self._bytes += len(data) - old
+        if self._bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        # rescan (other processes write here too) and trim to 90% of max_bytes
+        files = sorted(self._files())
+        total = sum(size for _, _, size in files)
+        for _, path, size in files:
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except OSError:
+                pass
+            total -= size
+        self._bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        return {'bytes': self._bytes, 'max_bytes': self.max_bytes, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+class ResultCache:
+    """Two-tier cache of graph results: an in-process LRU of pickled values
+    in front of an optional DiskCache.
+
+    Values are stored pickled and unpickled on every hit, so callers never
+    share (or mutate) a cached object. Results that cannot be pickled are
+    simply not cached.
+    """
+    def __init__(self, name: str, version: str = '', maxsize: int = 4096,
+                 directory: Optional[str] = None, max_bytes: int = 256 << 20):
+        self.name = name
+        self.version = version
+        self.memory = LRUCache(maxsize)
+        self.disk = DiskCache(os.path.join(directory, name), max_bytes) if directory else None
+
+    def key(self, payload: Any) -> str:
+        return stable_hash([self.version, payload])
+
+    def get(self, key: str) -> Any:
+        data = self.memory.get(key, None)
+        if data is None and self.disk is not None:
+            data = self.disk.get(key)
+            if data is not None:
+                self.memory.put(key, data)
+        return MISSING if data is None else pickle.loads(data)
+
+    def put(self, key: str, value: Any):
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        self.memory.put(key, data)
+        if self.disk is not None:
+            self.disk.put(key, data)
+
+    def call(self, fn: Callable[[Any], Any], payload: Any) -> Any:
+        key = self.key(payload)
+        value = self.get(key)
+        if value is MISSING:
+            value = fn(payload)
+            self.put(key, value)
+        return value
+
+    def map(self, batch_fn: Callable[[List[Any]], List[Any]], payloads: Sequence[Any]) -> List[Any]:
+        """batch_fn over the payloads that miss; hits are filled in from the cache, order kept."""
+        keys = [self.key(p) for p in payloads]
+        out = [self.get(k) for k in keys]
+        todo = [i for i, v in enumerate(out) if v is MISSING]
+        if todo:
+            for i, value in zip(todo, batch_fn([payloads[i] for i in todo])):
+                out[i] = value
+                self.put(keys[i], value)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        mem = self.memory.stats()
+        disk = self.disk.stats() if self.disk is not None else None
+        # every lookup goes to memory first; disk hits were memory misses
+        lookups = mem['hits'] + mem['misses']
+        hits = mem['hits'] + (disk['hits'] if disk else 0)
+        return {
+            'name': self.name, 'version': self.version, 'lookups': lookups, 'hits': hits,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0, 'memory': mem, 'disk': disk,
+        }
+
+_result_caches: Dict[str, ResultCache] = {}
+
+def result_cache(name: str, version: str, spec: Optional[str] = None) -> Optional[ResultCache]:
+    """Shared ResultCache for one graph, or None when caching is off.
+
+    spec (default $AGENT_PLATFORM_RESULT_CACHE) is 'memory' for the
+    in-process tier only, or a directory for both tiers.
+    """
+    spec = spec if spec is not None else os.environ.get(RESULT_CACHE_ENV)
+    if not spec or spec.lower() in ('0', 'off', 'false'):
+        return None
+    directory = None if spec == 'memory' else spec
+    key = f'{name}:{version}:{directory}'
+    cache = _result_caches.get(key)
+    if cache is None:
+        cache = _result_caches[key] = ResultCache(name, version, directory=directory)
+    return cache
+
+def result_cache_stats() -> List[Dict[str, Any]]:
+    return [c.stats() for c in _result_caches.values()]
@@ -0,0 +1,262 @@
+import hashlib, json, os, shutil, tempfile, uuid
+from typing import Callable, Iterator, Optional, Type
+import numpy as np
+from .batches import DICT, FLOAT, INT, STR, ColumnBatch, DictColumn, StrColumn
+
+# Parsed inputs are stored as raw column files under .column_cache/ next to
+# the source (or under $AGENT_PLATFORM_COLUMN_CACHE; "off" disables) and
+# opened with mmap, so re-runs and worker processes share the same pages.
+# Entries are keyed on the source path; (mtime, size) is the fast check and
+# the content sha256 decides whether a touched file really changed.
+#
+# A miss never holds the whole file: parsed chunks are appended to the
+# column files as they are produced. Numeric columns are little-endian
+# int64/float64, dictionary columns int32 codes plus a JSON list of values,
+# and free-text columns int64 offsets plus a UTF-8 byte blob.
+CACHE_ENV = 'AGENT_PLATFORM_COLUMN_CACHE'
+FORMAT_VERSION = 2
+
+DTYPES = {INT: '<i8', FLOAT: '<f8'}
+
+Parse = Callable[[str, int], Iterator[ColumnBatch]]
+
+def cache_root(path: str) -> Optional[str]:
+    env = os.environ.get(CACHE_ENV)
+    if env and env.lower() in ('0', 'off', 'false'):
+        return None
+    return env or os.path.join(os.path.dirname(os.path.abspath(path)), '.column_cache')
+
+def _entry_dir(root: str, cls: type, path: str) -> str:
+    key = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(root, f'{os.path.basename(path)}.{cls.__name__}.{key}')
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def _read_manifest(entry: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(entry, 'manifest.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_manifest(entry: str, manifest: dict):
+    tmp = os.path.join(entry, f'manifest.json.{uuid.uuid4().hex}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(entry, 'manifest.json'))
+
+class _ColumnWriter:
+    """Appends parsed chunks of one ColumnBatch class to column files in `directory`."""
+    def __init__(self, cls: Type[ColumnBatch], directory: str):
+        self.cls = cls
+        self.directory = directory
+        self.rows = 0
+        self._files = {}
+        self._index = {}
+        self._end = {}
+        os.makedirs(directory, exist_ok=True)
+        for name, kind in cls.FIELDS.items():
+            if kind == DICT:
+                self._files[name] = self._open(f'{name}.codes')
+                self._index[name] = {}
+            elif kind == STR:
+                self._files[name] = (self._open(f'{name}.offsets'), self._open(f'{name}.blob'))
+                self._files[name][0].write(np.zeros(1, dtype='<i8').tobytes())
+                self._end[name] = 0
+            else:
+                self._files[name] = self._open(name)
+
+    def _open(self, stem: str):
+        return open(os.path.join(self.directory, f'{stem}.bin'), 'wb')
+
+    def append(self, batch: ColumnBatch):
+        for name, kind in self.cls.FIELDS.items():
+            col = batch.columns[name]
+            if kind == DICT:
+                # remap the chunk's dictionary into the file-wide one
+                index = self._index[name]
+                remap = np.fromiter((index.setdefault(v, len(index)) for v in col.values), dtype=np.int32, count=len(col.values))
+                codes = np.where(col.codes >= 0, remap[np.maximum(col.codes, 0)] if len(remap) else -1, -1)
+                self._files[name].write(codes.astype('<i4').tobytes())
+            elif kind == STR:
+                parts = [s.encode('utf-8') for s in col.tolist()]
+                if parts:
+                    ends = self._end[name] + np.cumsum(np.fromiter(map(len, parts), dtype=np.int64, count=len(parts)))
+                    offsets, blob = self._files[name]
+                    offsets.write(ends.astype('<i8').tobytes())
+                    blob.write(b''.join(parts))
+                    self._end[name] = int(ends[-1])
+            else:
+                self._files[name].write(np.ascontiguousarray(col, dtype=DTYPES[kind]).tobytes())
+        self.rows += len(batch)
+
+    def _close_files(self):
+        for f in self._files.values():
+            for g in (f if isinstance(f, tuple) else (f,)):
+                g.close()
+
+    def close(self):
+        self._close_files()
+        for name, index in self._index.items():
+            with open(os.path.join(self.directory, f'{name}.values.json'), 'w', encoding='utf-8') as f:
+                json.dump(list(index), f)
+        with open(os.path.join(self.directory, 'layout.json'), 'w', encoding='utf-8') as f:
+            json.dump({'rows': self.rows, 'columns': self.cls.FIELDS}, f)
+
+    def abort(self):
+        self._close_files()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+def _map(path: str, dtype: str, count: int) -> np.ndarray:
+    # empty files cannot be mapped
+    return np.memmap(path, dtype=dtype, mode='r', shape=(count,)) if count else np.zeros(0, dtype=dtype)
+
+def _open(cls: Type[ColumnBatch], directory: str) -> ColumnBatch:
+    with open(os.path.join(directory, 'layout.json'), 'r', encoding='utf-8') as f:
+        rows = json.load(f)['rows']
+    columns = {}
+    for name, kind in cls.FIELDS.items():
+        stem = os.path.join(directory, name)
+        if kind == DICT:
+            with open(f'{stem}.values.json', 'r', encoding='utf-8') as f:
+                values = json.load(f)
+            columns[name] = DictColumn(_map(f'{stem}.codes.bin', '<i4', rows), values)
+        elif kind == STR:
+            offsets = _map(f'{stem}.offsets.bin', '<i8', rows + 1) if rows else np.zeros(1, dtype='<i8')
+            columns[name] = StrColumn(offsets, _map(f'{stem}.blob.bin', 'u1', int(offsets[-1])))
+        else:
+            columns[name] = _map(f'{stem}.bin', DTYPES[kind], rows)
+    return cls(columns)
+
+def _usable(manifest: Optional[dict], cls: type) -> bool:
+    return (manifest is not None and manifest.get('version') == FORMAT_VERSION
+            and manifest.get('class') == cls.__name__ and manifest.get('fields') == cls.FIELDS)
+
+def _slices(batch: ColumnBatch, chunk_size: int) -> Iterator[ColumnBatch]:
+    for start in range(0, len(batch), chunk_size):
+        yield batch[start:start + chunk_size]
+
+class _Entry:
+    """Cache lookup for one source: open() the current columns, or start() a writer for a new version."""
+    def __init__(self, cls: Type[ColumnBatch], path: str):
+        self.cls = cls
+        self.path = path
+        root = cache_root(path)
+        self.dir = _entry_dir(root, cls, path) if root is not None else None
+        self.digest = None
+
+    def open(self) -> Optional[ColumnBatch]:
+        if self.dir is None:
+            return None
+        st = os.stat(self.path)
+        self.stamp = [st.st_mtime_ns, st.st_size]
+        manifest = _read_manifest(self.dir)
+        usable = _usable(manifest, self.cls)
+        try:
+            if usable and manifest['stamp'] == self.stamp:
+                return _open(self.cls, os.path.join(self.dir, manifest['data']))
+            self.digest = _file_sha256(self.path)
+            if usable and manifest['sha256'] == self.digest:
+                # touched but unchanged: refresh the stamp and reuse the columns
+                manifest['stamp'] = self.stamp
+                _write_manifest(self.dir, manifest)
+                return _open(self.cls, os.path.join(self.dir, manifest['data']))
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def start(self) -> Optional[_ColumnWriter]:
+        if self.dir is None:
+            return None
+        try:
+            self.digest = self.digest or _file_sha256(self.path)
+            return _ColumnWriter(self.cls, os.path.join(self.dir, f'{uuid.uuid4().hex}.tmp'))
+        except OSError:
+            return None
+
+    def commit(self, writer: _ColumnWriter) -> str:
+        writer.close()
+        data = self.digest[:16]
+        final = os.path.join(self.dir, data)
+        try:
+            os.rename(writer.directory, final)
+        except OSError:  # another process stored the same content first
+            shutil.rmtree(writer.directory, ignore_errors=True)
+        _write_manifest(self.dir, {
+            'version': FORMAT_VERSION, 'class': self.cls.__name__, 'fields': self.cls.FIELDS,
+            'sha256': self.digest, 'stamp': self.stamp, 'data': data, 'rows': writer.rows,
+        })
+        for name in os.listdir(self.dir):  # older contents of this source; open mmaps stay valid
+            if name not in (data, 'manifest.json') and not name.endswith('.tmp'):
+                shutil.rmtree(os.path.join(self.dir, name), ignore_errors=True)
+        return final
+
+def cached_batches(cls: Type[ColumnBatch], path: str, parse: Parse, chunk_size: int) -> Iterator[ColumnBatch]:
+    """Chunks of `path`: slices of the cached columns, or on a miss parse(path, chunk_size)'s
+    chunks as they are produced, appended to a new cache entry on the way.
+
+    The entry is only committed once every chunk has been consumed; a
+    consumer that stops early, or any cache I/O failure, leaves no entry and
+    does not interrupt the stream.
+    """
+    entry = _Entry(cls, path)
+    cached = entry.open()
+    if cached is not None:
+        yield from _slices(cached, chunk_size)
+        return
+    writer = entry.start()
+    try:
+        for chunk in parse(path, chunk_size):
+            if writer is not None:
+                try:
+                    writer.append(chunk)
+                except OSError:
+                    writer.abort()
+                    writer = None
+            yield chunk
+        if writer is not None:
+            done, writer = writer, None
+            try:
+                entry.commit(done)
+            except OSError:
+                done.abort()
+    finally:
+        if writer is not None:
+            writer.abort()
+
+def cached_batch(cls: Type[ColumnBatch], path: str, parse: Parse, chunk_size: int) -> ColumnBatch:
+    """All of `path` as one batch of read-only memory-mapped columns.
+
+    On a miss the parsed chunks are streamed into a new cache entry, which is
+    then mapped. Without a usable cache directory they are spilled to a
+    temporary directory instead, so the columns are still file-backed.
+    """
+    entry = _Entry(cls, path)
+    cached = entry.open()
+    if cached is not None:
+        return cached
+    writer = entry.start()
+    if writer is not None:
+        try:
+            for chunk in parse(path, chunk_size):
+                writer.append(chunk)
+            return _open(cls, entry.commit(writer))
+        except OSError:
+            writer.abort()
+        except BaseException:
+            writer.abort()
+            raise
+    # the mapped files stay readable after the directory is removed
+    writer = _ColumnWriter(cls, tempfile.mkdtemp(prefix='colcache-'))
+    try:
+        for chunk in parse(path, chunk_size):
+            writer.append(chunk)
+        writer.close()
+        return _open(cls, writer.directory)
+    finally:
+        shutil.rmtree(writer.directory, ignore_errors=True)
@@ -0,0 +1,59 @@
+import os, threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+class DuckDBPool:
+    """One shared DuckDB database handing out a long-lived cursor per thread.
+
+    Cursors are independent client contexts, so concurrent requests can each
+    register a view under the same name without seeing each other's data.
+    """
+    def __init__(self, database: str = ':memory:'):
+        self.database = database
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        import duckdb  # deferred: only paid by processes that run analytics
+        self._pid = os.getpid()
+        self._con = duckdb.connect(self.database)
+        self._local = threading.local()
+
+    def cursor(self) -> 'duckdb.DuckDBPyConnection':
+        if self._pid != os.getpid():
+            # forked worker: the parent's handle must not be shared
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._open()
+        cur = getattr(self._local, 'cursor', None)
+        if cur is None:
+            with self._lock:
+                cur = self._con.cursor()
+            self._local.cursor = cur
+        return cur
+
+    @contextmanager
+    def registered(self, name: str, data: Any) -> Iterator['duckdb.DuckDBPyConnection']:
+        # data: Arrow table, dict of NumPy arrays or DataFrame; unregistered on exit
+        cur = self.cursor()
+        cur.register(name, data)
+        try:
+            yield cur
+        finally:
+            cur.unregister(name)
+
+    def close(self):
+        with self._lock:
+            self._con.close()
+            self._local = threading.local()
+
+_pool: Optional[DuckDBPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> DuckDBPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = DuckDBPool()
+    return _pool
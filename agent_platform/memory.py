@@ -1,11 +1,79 @@
+import json, os
 from collections import deque
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+class Turn(NamedTuple):
+    """One memory entry; content is formatted from template and args only when read."""
+    role: str
+    template: str
+    args: Tuple = ()
+
+    @property
+    def content(self) -> str:
+        return self.template.format(*self.args) if self.args else self.template
 
 class ConversationMemory:
-    def __init__(self, max_turns: int = 6):
+    """Last max_turns turns of an agent, kept as tuples with deferred formatting.
+
+    sample=0.1 keeps every 10th add() call. With spill_path, turns pushed
+    out of the window are appended to a JSONL file instead of dropped.
+    """
+    enabled = True
+
+    def __init__(self, max_turns: int = 6, sample: float = 1.0, spill_path: Optional[str] = None):
         self.buffer = deque(maxlen=max_turns)
+        self.every = max(1, round(1 / sample)) if sample < 1 else 1
+        self.spill_path = spill_path
+        self._calls = 0
+
+    def add(self, role: str, template: str, *args):
+        if self.every > 1:
+            self._calls += 1
+            if self._calls % self.every:
+                return
+        if self.spill_path is not None and len(self.buffer) == self.buffer.maxlen:
+            self._spill_turn(self.buffer[0])
+        self.buffer.append(Turn(role, template, args))
+
+    def _spill_turn(self, turn: Turn):
+        # opened per turn: agents are never torn down, and copies sent to worker
+        # processes would each hold their own handle
+        os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'role': turn.role, 'content': turn.content}) + '\n')
+
+    def turns(self) -> Iterator[Turn]:
+        return iter(self.buffer)
 
-    def add(self, role: str, content: str):
-        self.buffer.append({"role": role, "content": content})
+    def spilled(self) -> Iterator[dict]:
+        if self.spill_path is None or not os.path.exists(self.spill_path):
+            return
+        with open(self.spill_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
 
     def summary(self) -> str:
-        return " \n".join([f"{m['role']}: {m['content']}" for m in self.buffer])
+        return " \n".join([f"{m.role}: {m.content}" for m in self.buffer])
+
+class NullMemory:
+    """Memory switched off: add() does nothing."""
+    enabled = False
+    buffer = ()
+
+    def add(self, role: str, template: str, *args):
+        pass
+
+    def turns(self) -> Iterator[Turn]:
+        return iter(())
+
+    def spilled(self) -> Iterator[dict]:
+        return iter(())
+
+    def summary(self) -> str:
+        return ""
+
+def make_memory(max_turns: int = 6, sample: float = 1.0, spill_path: Optional[str] = None):
+    # memory_turns: 0 or memory_sample: 0 in agents.yml switches memory off
+    if max_turns <= 0 or sample <= 0:
+        return NullMemory()
+    return ConversationMemory(max_turns, sample, spill_path)
@@ -0,0 +1,137 @@
+import sqlite3, threading
+from typing import Any, Dict, List, Optional
+from .batches import LoanBatch
+from .tools import RateCurve, breakeven_rates, calculate_savings_batch
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL);
+CREATE TABLE IF NOT EXISTS rates (term_months INTEGER PRIMARY KEY, rate REAL);
+CREATE TABLE IF NOT EXISTS loans (
+    borrower_id TEXT PRIMARY KEY, loan_balance REAL, current_rate REAL, remaining_term_months INTEGER,
+    market_rate REAL, monthly_savings REAL, refi_alert TEXT, breakeven REAL
+);
+CREATE INDEX IF NOT EXISTS loans_breakeven ON loans (breakeven);
+"""
+
+LOAN_FIELDS = ('borrower_id', 'loan_balance', 'current_rate', 'remaining_term_months')
+_STORED = "borrower_id, loan_balance, current_rate, remaining_term_months, market_rate, monthly_savings, refi_alert"
+
+# band around the rate move for the break-even range query; candidates are re-checked exactly
+_EPS = 1e-9
+
+def _row(r: tuple, change: str) -> Dict[str, Any]:
+    return {
+        'borrower_id': r[0], 'current_rate': r[2], 'market_rate': r[4],
+        'monthly_savings': r[5], 'refi_alert': r[6], 'change': change,
+    }
+
+class RefiMonitor:
+    """Persisted refi evaluation state: last market rate per term and per-loan savings.
+
+    update() diffs a loan book and rate curve against the stored state. New
+    and changed loans are evaluated; for the rest, only loans whose alert can
+    flip are re-checked. Each loan stores its break-even rate (the highest
+    market rate that still alerts), indexed, so a market rate move from a to
+    b is a range query for break-evens between a and b. A changed threshold
+    invalidates the break-evens and re-evaluates the whole book.
+
+    Stored savings are as of the rate each loan was last evaluated at;
+    refi_alert is always current.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        self._con.executescript(SCHEMA)
+        self._con.execute(
+            "CREATE TEMP TABLE incoming (borrower_id TEXT PRIMARY KEY, loan_balance REAL, current_rate REAL, "
+            "remaining_term_months INTEGER)"
+        )
+
+    def _meta(self, key: str) -> Optional[float]:
+        row = self._con.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _evaluate(self, rows: List[tuple], market_rate: float, threshold: float) -> List[tuple]:
+        # rows of LOAN_FIELDS -> stored loan rows at market_rate
+        if not rows:
+            return []
+        ids, balances, current, terms = (list(c) for c in zip(*rows))
+        savings = calculate_savings_batch(balances, current, terms, market_rate)
+        breakeven = breakeven_rates(balances, current, terms, threshold)
+        alerts = (savings >= threshold).tolist()
+        return [
+            (b, bal, cr, t, market_rate, s, 'Yes' if a else 'No', be)
+            for b, bal, cr, t, s, a, be in zip(ids, balances, current, terms, savings.tolist(), alerts, breakeven.tolist())
+        ]
+
+    def update(self, loans: LoanBatch, curve: RateCurve, threshold: float = 150.0,
+               term_months: Optional[int] = None) -> Dict[str, Any]:
+        """Apply a run; returns the market rate move, changed terms and the loans that changed.
+
+        Each change row is tagged 'new', 'changed' (loan terms differ), 'flipped'
+        (refi_alert flipped with the market rate or threshold) or 'removed'.
+        """
+        market_rate = curve.market_rate(term_months)
+        best = curve.best_by_term()
+        incoming = zip(loans.borrower_id.tolist(), loans.loan_balance.tolist(),
+                       loans.current_rate.tolist(), loans.remaining_term_months.tolist())
+        with self._lock, self._con as con:
+            prev_rate, prev_threshold = self._meta('market_rate'), self._meta('threshold')
+            old_rates = dict(con.execute("SELECT term_months, rate FROM rates"))
+            changed_terms = sorted(t for t in set(best) | set(old_rates) if best.get(t) != old_rates.get(t))
+
+            con.execute("DELETE FROM incoming")
+            con.executemany("INSERT OR REPLACE INTO incoming VALUES (?, ?, ?, ?)", incoming)
+            removed = con.execute(
+                f"SELECT {_STORED} FROM loans WHERE borrower_id NOT IN (SELECT borrower_id FROM incoming)"
+            ).fetchall()
+            diff = con.execute("""
+                SELECT i.borrower_id, i.loan_balance, i.current_rate, i.remaining_term_months, l.borrower_id IS NULL
+                FROM incoming i LEFT JOIN loans l USING (borrower_id)
+                WHERE l.borrower_id IS NULL OR l.loan_balance != i.loan_balance
+                    OR l.current_rate != i.current_rate OR l.remaining_term_months != i.remaining_term_months
+            """).fetchall()
+            touched = {r[0] for r in diff}
+
+            # unchanged loans whose alert may flip
+            if prev_threshold != threshold:
+                candidates = con.execute(
+                    f"SELECT {_STORED} FROM loans WHERE borrower_id IN (SELECT borrower_id FROM incoming)"
+                ).fetchall()
+            elif prev_rate is not None and prev_rate != market_rate:
+                lo, hi = sorted((prev_rate, market_rate))
+                candidates = con.execute(
+                    f"SELECT {_STORED} FROM loans WHERE breakeven BETWEEN ? AND ? "
+                    "AND borrower_id IN (SELECT borrower_id FROM incoming)", (lo - _EPS, hi + _EPS)
+                ).fetchall()
+            else:
+                candidates = []
+            candidates = [r for r in candidates if r[0] not in touched]
+
+            fresh = self._evaluate([r[:4] for r in diff], market_rate, threshold)
+            rechecked = self._evaluate([r[:4] for r in candidates], market_rate, threshold)
+            con.execute("DELETE FROM loans WHERE borrower_id NOT IN (SELECT borrower_id FROM incoming)")
+            con.executemany("INSERT OR REPLACE INTO loans VALUES (?, ?, ?, ?, ?, ?, ?, ?)", fresh + rechecked)
+            con.execute("DELETE FROM rates")
+            con.executemany("INSERT INTO rates VALUES (?, ?)", best.items())
+            con.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                            [('market_rate', market_rate), ('threshold', threshold)])
+
+        changes = [_row(r, 'new' if d[4] else 'changed') for r, d in zip(fresh, diff)]
+        changes += [_row(r, 'flipped') for r, old in zip(rechecked, candidates) if r[6] != old[6]]
+        changes += [_row(r, 'removed') for r in removed]
+        return {
+            'market_rate': market_rate, 'previous_market_rate': prev_rate,
+            'changed_terms': changed_terms, 'evaluated': len(fresh) + len(rechecked), 'changes': changes,
+        }
+
+    def alerts(self, flagged_only: bool = False) -> List[Dict[str, Any]]:
+        where = "WHERE refi_alert = 'Yes'" if flagged_only else ""
+        with self._lock:
+            rows = self._con.execute(f"SELECT {_STORED} FROM loans {where} ORDER BY borrower_id").fetchall()
+        return [_row(r, 'current') for r in rows]
+
+    def close(self):
+        with self._lock:
+            self._con.close()
@@ -1,5 +1,7 @@
-from typing import Callable, Dict, Any
-import importlib
+from typing import Callable, Dict, Any, AsyncIterator, Iterable, Iterator, List, Optional
+from collections import deque
+import functools, importlib, json, os, sys, threading, time
+from .utils import MISSING, iter_chunks, now_ms
 
 def has_langgraph() -> bool:
     try:
@@ -8,14 +10,381 @@ def has_langgraph() -> bool:
     except Exception:
         return False
 
+BACKENDS = ('serial', 'thread', 'process', 'asyncio')
+
+class ParallelExecutor:
+    """Order-preserving map over records or chunks with bounded concurrency.
+
+    Backends: 'serial' (caller's thread), 'thread', 'process' (fn and items
+    must be picklable) and 'asyncio' (coroutine functions are awaited, plain
+    callables run via asyncio.to_thread). At most max_in_flight items are
+    pending at any time.
+    """
+    def __init__(self, backend: str = 'serial', max_workers: Optional[int] = None, max_in_flight: Optional[int] = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown executor backend {backend!r}; expected one of {BACKENDS}")
+        self.backend = backend
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.max_workers
+
+    def map(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[Any]:
+        if self.backend == 'serial':
+            yield from map(fn, items)
+        elif self.backend == 'asyncio':
+            import asyncio
+            loop = asyncio.new_event_loop()
+            agen = self.amap(fn, items)
+            try:
+                while True:
+                    try:
+                        yield loop.run_until_complete(agen.__anext__())
+                    except StopAsyncIteration:
+                        break
+            finally:
+                loop.run_until_complete(agen.aclose())
+                loop.close()
+        else:
+            from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+            pool_cls = ThreadPoolExecutor if self.backend == 'thread' else ProcessPoolExecutor
+            with pool_cls(max_workers=self.max_workers) as pool:
+                window = deque()
+                for item in items:
+                    window.append(pool.submit(fn, item))
+                    if len(window) >= self.max_in_flight:
+                        yield window.popleft().result()
+                while window:
+                    yield window.popleft().result()
+
+    async def amap(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> AsyncIterator[Any]:
+        import asyncio
+        call = fn if asyncio.iscoroutinefunction(fn) else (lambda item: asyncio.to_thread(fn, item))
+        window = deque()
+        try:
+            for item in items:
+                window.append(asyncio.ensure_future(call(item)))
+                if len(window) >= self.max_in_flight:
+                    yield await window.popleft()
+            while window:
+                yield await window.popleft()
+        finally:
+            for fut in window:
+                fut.cancel()
+
+def count_rows(x: Any) -> int:
+    # rows carried by a payload: list length, or the longest sized value in a dict
+    if isinstance(x, dict):
+        return max((len(v) for v in x.values() if hasattr(v, '__len__') and not isinstance(v, (str, bytes, dict))),
+                   default=1 if x else 0)
+    if hasattr(x, '__len__') and not isinstance(x, (str, bytes)):
+        return len(x)
+    return 0 if x is None else 1
+
+def _name(fn: Callable) -> str:
+    fn = getattr(fn, 'func', fn)  # functools.partial
+    return getattr(fn, '__qualname__', None) or type(fn).__name__
+
+PROFILERS = ('cprofile', 'pyinstrument')
+
+class Tracer:
+    """Records one span per node or tool call: wall/CPU ms, rows in/out, allocated KB.
+
+    Memory tracking uses tracemalloc and slows the run down noticeably, so it
+    is opt-in. Spans from process-pool workers are not collected.
+    """
+    def __init__(self, path: Optional[str] = None, memory: bool = False,
+                 profile: Optional[str] = None, profile_path: Optional[str] = None):
+        if profile is not None and profile not in PROFILERS:
+            raise ValueError(f"unknown profiler {profile}; expected one of {PROFILERS}")
+        self.path = path
+        self.memory = memory
+        self.profile = profile
+        self.profile_path = profile_path
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._profiler = None
+
+    def start(self):
+        if self.memory:
+            import tracemalloc
+            tracemalloc.start()
+        if self.profile == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise ValueError("pyinstrument is not installed")
+            self._profiler = Profiler()
+            self._profiler.start()
+        return self
+
+    def call(self, kind: str, name: str, fn: Callable, *args, **kwargs):
+        if self.memory:
+            import tracemalloc
+            mem0 = tracemalloc.get_traced_memory()[0]
+        w0, c0 = time.perf_counter(), time.thread_time()
+        out = fn(*args, **kwargs)
+        wall, cpu = time.perf_counter() - w0, time.thread_time() - c0
+        span = {
+            'ts': now_ms(), 'kind': kind, 'name': name,
+            'wall_ms': round(wall * 1000, 3), 'cpu_ms': round(cpu * 1000, 3),
+            'rows_in': count_rows(args[0]) if args else 0, 'rows_out': count_rows(out),
+        }
+        if self.memory:
+            span['alloc_kb'] = round((tracemalloc.get_traced_memory()[0] - mem0) / 1024, 1)
+        with self._lock:
+            self.spans.append(span)
+        return out
+
+    def summary(self) -> List[Dict[str, Any]]:
+        groups: Dict[tuple, Dict[str, Any]] = {}
+        for s in self.spans:
+            g = groups.setdefault((s['kind'], s['name']), {
+                'kind': s['kind'], 'name': s['name'], 'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0,
+                'rows_in': 0, 'rows_out': 0, 'alloc_kb': 0.0})
+            g['calls'] += 1
+            for k in ('wall_ms', 'cpu_ms', 'rows_in', 'rows_out', 'alloc_kb'):
+                g[k] += s.get(k, 0)
+        return sorted(groups.values(), key=lambda g: -g['wall_ms'])
+
+    def format_summary(self) -> str:
+        lines = [f"{'kind':<5} {'name':<44} {'calls':>7} {'wall ms':>10} {'cpu ms':>10} {'rows in':>10} {'rows out':>10}"
+                 + (f" {'alloc KB':>10}" if self.memory else '')]
+        for g in self.summary():
+            lines.append(f"{g['kind']:<5} {g['name'][:44]:<44} {g['calls']:>7} {g['wall_ms']:>10.1f} {g['cpu_ms']:>10.1f} "
+                         f"{g['rows_in']:>10} {g['rows_out']:>10}" + (f" {g['alloc_kb']:>10.1f}" if self.memory else ''))
+        return '\n'.join(lines)
+
+    def close(self):
+        if self._profiler is not None:
+            if self.profile == 'cprofile':
+                self._profiler.disable()
+                if self.profile_path:
+                    self._profiler.dump_stats(self.profile_path)
+                else:
+                    self._profiler.print_stats('cumulative')
+            else:
+                self._profiler.stop()
+                text = self._profiler.output_text()
+                if self.profile_path:
+                    with open(self.profile_path, 'w', encoding='utf-8') as f:
+                        f.write(text)
+                else:
+                    sys.stderr.write(text)
+            self._profiler = None
+        if self.memory:
+            import tracemalloc
+            tracemalloc.stop()
+        if self.path:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                for s in self.spans:
+                    f.write(json.dumps(s) + '\n')
+
+# Module-level switch: graphs and the tool runtime check it once per run or
+# resolve, so untraced runs pay a single None test.
+_tracer: Optional[Tracer] = None
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+def enable_tracing(path: Optional[str] = None, memory: bool = False,
+                   profile: Optional[str] = None, profile_path: Optional[str] = None) -> Tracer:
+    global _tracer
+    _tracer = Tracer(path, memory, profile, profile_path).start()
+    return _tracer
+
+def disable_tracing() -> Optional[Tracer]:
+    global _tracer
+    t, _tracer = _tracer, None
+    if t is not None:
+        t.close()
+    return t
+
+Node = Callable[[Dict[str, Any]], Dict[str, Any]]
+BatchNode = Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+
 class SimpleGraph:
-    def __init__(self):
+    def __init__(self, cache=None):
+        # cache: optional cache.ResultCache; run/run_batch/stream then skip payloads seen before
         self.nodes = []
-    def add(self, fn: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        self.batch_nodes = []
+        self.cache = cache
+    def add(self, fn: Node, batch: Optional[BatchNode] = None):
+        # batch, if given, maps a list of payloads to a list of outputs in one call
         self.nodes.append(fn)
+        self.batch_nodes.append(batch)
         return self
     def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self.cache is not None:
+            return self.cache.call(self._run, payload)
+        return self._run(payload)
+    def _run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        t = _tracer
         x = payload
         for fn in self.nodes:
-            x = fn(x)
+            x = fn(x) if t is None else t.call('node', _name(fn), fn, x)
         return x
+    def run_batch(self, payloads: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.cache is not None:
+            return self.cache.map(self._run_batch, list(payloads))
+        return self._run_batch(payloads)
+    def _run_batch(self, payloads: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        t = _tracer
+        xs = list(payloads)
+        for fn, batch in zip(self.nodes, self.batch_nodes):
+            if t is not None:
+                xs = t.call('node', _name(batch or fn), batch or _map_node(fn), xs)
+            else:
+                xs = batch(xs) if batch is not None else [fn(x) for x in xs]
+        return xs
+    def stream(self, payloads: Iterable[Dict[str, Any]], chunk_size: int = 1024,
+               executor: Optional[ParallelExecutor] = None) -> Iterator[Dict[str, Any]]:
+        chunks = iter_chunks(payloads, chunk_size)
+        if executor is None:
+            for chunk in chunks:
+                yield from self.run_batch(chunk)
+        else:
+            for outs in executor.map(self.run_batch, chunks):
+                yield from outs
+
+class LocalGraph:
+    """In-process stand-in for a compiled linear StateGraph(dict): each node's
+    returned keys are merged into the state before the next node runs."""
+    def __init__(self, nodes: Iterable[tuple]):
+        self.nodes = list(nodes)
+    def invoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        state = dict(state)
+        for _, fn in self.nodes:
+            state.update(fn(state))
+        return state
+
+class CachedGraph:
+    """A compiled graph behind a ResultCache: invoke/ainvoke return the cached
+    result for a state seen before; everything else goes to the graph."""
+    def __init__(self, graph, cache):
+        self.graph = graph
+        self.cache = cache
+    def invoke(self, state: Dict[str, Any], *args, **kwargs) -> Dict[str, Any]:
+        if args or kwargs:  # config/streaming options: not part of the key
+            return self.graph.invoke(state, *args, **kwargs)
+        return self.cache.call(self.graph.invoke, state)
+    async def ainvoke(self, state: Dict[str, Any], *args, **kwargs) -> Dict[str, Any]:
+        if args or kwargs:
+            return await self.graph.ainvoke(state, *args, **kwargs)
+        key = self.cache.key(state)
+        value = self.cache.get(key)
+        if value is MISSING:
+            value = await self.graph.ainvoke(state)
+            self.cache.put(key, value)
+        return value
+    def __getattr__(self, name: str):
+        try:
+            graph = self.__dict__['graph']
+        except KeyError:
+            raise AttributeError(name)
+        return getattr(graph, name)
+
+def cached_graph(graph, cache):
+    return CachedGraph(graph, cache) if cache is not None else graph
+
+def build_state_graph(nodes: Iterable[tuple]):
+    """Compile (name, fn) pairs into a linear LangGraph StateGraph(dict)."""
+    from langgraph.graph import StateGraph
+    nodes = list(nodes)
+    sg = StateGraph(dict)
+    for name, fn in nodes:
+        sg.add_node(name, fn)
+    sg.set_entry_point(nodes[0][0])
+    for (a, _), (b, _) in zip(nodes, nodes[1:]):
+        sg.add_edge(a, b)
+    sg.set_finish_point(nodes[-1][0])
+    return sg.compile()
+
+class GraphError(Exception): pass
+
+def _map_node(fn: Node) -> BatchNode:
+    return lambda xs: [fn(x) for x in xs]
+
+class DagNode:
+    __slots__ = ('name', 'fn', 'reads', 'writes')
+
+    def __init__(self, name: str, fn: Node, reads: Iterable[str], writes: Iterable[str]):
+        self.name = name
+        self.fn = fn
+        self.reads = tuple(reads)
+        self.writes = tuple(writes)
+
+def _call_node(args):
+    fn, view = args
+    return fn(view)
+
+def _written(node: DagNode, state: Dict[str, Any]) -> bool:
+    # a node with no writes is never already done
+    return bool(node.writes) and all(k in state for k in node.writes)
+
+class DagGraph:
+    """Nodes declare the state keys they read and write; the scheduler orders them.
+
+    Each node receives a dict holding only its declared reads and must return
+    its declared writes, which are merged into one shared state dict. Nodes
+    that become ready together run concurrently on the executor, and nodes
+    whose writes are all present in the incoming state are skipped. Nodes
+    that write nothing (sinks, side effects) always run on a full run.
+    """
+    def __init__(self, executor: Optional[ParallelExecutor] = None):
+        self.nodes: Dict[str, DagNode] = {}
+        self.producers: Dict[str, DagNode] = {}
+        self.executor = executor
+
+    def add(self, name: str, fn: Node, reads: Iterable[str] = (), writes: Iterable[str] = ()):
+        if name in self.nodes:
+            raise GraphError(f"duplicate node {name}")
+        node = DagNode(name, fn, reads, writes)
+        for key in node.writes:
+            if key in self.producers:
+                raise GraphError(f"{key} is written by both {self.producers[key].name} and {name}")
+        self.nodes[name] = node
+        for key in node.writes:
+            self.producers[key] = node
+        return self
+
+    def _plan(self, state: Dict[str, Any], targets: Optional[Iterable[str]]) -> List[DagNode]:
+        if targets is None:
+            needed = list(self.nodes.values())
+        else:
+            needed, seen, stack = [], set(), list(targets)
+            while stack:
+                node = self.producers.get(stack.pop())
+                if node is None or node.name in seen or _written(node, state):
+                    continue
+                seen.add(node.name)
+                needed.append(node)
+                stack.extend(k for k in node.reads if k not in state)
+        return [n for n in needed if not _written(n, state)]
+
+    def run(self, payload: Dict[str, Any], targets: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        state = dict(payload)
+        pending = self._plan(state, targets)
+        while pending:
+            unwritten = {k for n in pending for k in n.writes}
+            ready = [n for n in pending if all(k in state and k not in unwritten for k in n.reads)]
+            if not ready:
+                missing = sorted({k for n in pending for k in n.reads if k not in state and k not in unwritten})
+                raise GraphError(f"cannot schedule {[n.name for n in pending]}; missing inputs {missing}")
+            executor = self.executor or ParallelExecutor('thread', max_workers=len(ready))
+            t = _tracer if executor.backend != 'process' else None
+            calls = [(n.fn if t is None else functools.partial(t.call, 'node', n.name, n.fn),
+                      {k: state[k] for k in n.reads}) for n in ready]
+            if len(ready) == 1:
+                outs = [_call_node(calls[0])]
+            else:
+                outs = list(executor.map(_call_node, calls))
+            for node, out in zip(ready, outs):
+                for key in node.writes:
+                    if key not in out:
+                        raise GraphError(f"node {node.name} did not write {key}")
+                    state[key] = out[key]
+            pending = [n for n in pending if n not in ready]
+        return state
@@ -0,0 +1,225 @@
+import json, os, shutil, sys, tempfile, threading
+from typing import Any, Callable, Dict, Optional, Union
+from .utils import atomic_open, json_dumpb, temp_path
+
+FORMATS = ('json', 'ndjson', 'parquet', 'arrow')
+ECHO_MODES = ('full', 'summary', 'none')
+EXTENSIONS = {'json': '.json', 'ndjson': '.ndjson', 'parquet': '.parquet', 'arrow': '.arrow'}
+
+Head = Union[Dict[str, Any], Callable[[Optional[dict]], Dict[str, Any]]]
+
+# use cases may write concurrently (run.py all --executor thread|asyncio);
+# each file's echo goes to stdout in one piece under this lock
+_STDOUT_LOCK = threading.Lock()
+
+def _echo(src, end: str = ''):
+    # src: text or a text file positioned at its start
+    with _STDOUT_LOCK:
+        if isinstance(src, str):
+            sys.stdout.write(src)
+        else:
+            shutil.copyfileobj(src, sys.stdout)
+        sys.stdout.write(end)
+        sys.stdout.flush()
+
+class RecordWriter:
+    """Streams records into one output file.
+
+    Records go to a temp file next to `path` that is renamed into place by
+    close(); used as a context manager, an exception discards the temp file
+    and leaves any previous output untouched. echo='full' also writes the
+    records to stdout, 'summary' prints one line with the path and record
+    count; both happen once, on close, so concurrent writers never
+    interleave.
+    """
+    FORMAT = None
+    MODE = 'wb'
+
+    def __init__(self, path: str, echo: str = 'none'):
+        if echo not in ECHO_MODES:
+            raise ValueError(f"unknown echo mode {echo}; expected one of {ECHO_MODES}")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.echo = echo
+        self.count = 0
+        self._tmp = temp_path(path)
+        self._f = open(self._tmp, self.MODE, **({} if 'b' in self.MODE else {'encoding': 'utf-8'}))
+
+    def write(self, record: dict):
+        raise NotImplementedError
+
+    def write_many(self, records):
+        for r in records:
+            self.write(r)
+
+    def _finish(self):
+        pass
+
+    def close(self):
+        if self._f is None:
+            return
+        try:
+            self._finish()
+            self._f.close()
+            os.replace(self._tmp, self.path)
+        except BaseException:
+            self.abort()
+            raise
+        self._f = None
+        if self.echo == 'full':
+            self._echo_full()
+        elif self.echo == 'summary':
+            _echo(json.dumps({'path': self.path, 'format': self.FORMAT, 'records': self.count}) + '\n')
+
+    ECHO_END = ''
+
+    def _echo_full(self):
+        # the file is its own echo; copied from disk so records are not kept in memory
+        with open(self.path, 'r', encoding='utf-8') as f:
+            _echo(f, self.ECHO_END)
+
+    def abort(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            os.remove(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+class JSONWriter(RecordWriter):
+    """The indent=2 JSON document the outputs/ artifacts have always used,
+    {<head keys>, key: [records]}, built incrementally. `head` may be a
+    function of the first record (None when there are none). Byte-identical
+    to json.dump(doc, indent=2).
+    """
+    FORMAT = 'json'
+    MODE = 'w'
+    ECHO_END = '\n'
+
+    def __init__(self, path: str, key: str, head: Head = None, echo: str = 'none'):
+        super().__init__(path, echo)
+        self.key = key
+        self.head = head
+
+    def _open_doc(self, first: Optional[dict]):
+        head = self.head(first) if callable(self.head) else (self.head or {})
+        parts = [f'  {json.dumps(k)}: {json.dumps(v, indent=2)}'.replace('\n', '\n  ') for k, v in head.items()]
+        self._f.write('{\n' + ''.join(p + ',\n' for p in parts) + f'  {json.dumps(self.key)}: ')
+
+    def write(self, record: dict):
+        if self.count == 0:
+            self._open_doc(record)
+            self._f.write('[\n    ')
+        else:
+            self._f.write(',\n    ')
+        self._f.write(json.dumps(record, indent=2).replace('\n', '\n    '))
+        self.count += 1
+
+    def _finish(self):
+        if self.count == 0:
+            self._open_doc(None)
+            self._f.write('[]\n}')
+        else:
+            self._f.write('\n  ]\n}')
+
+class NDJSONWriter(RecordWriter):
+    """One compact JSON object per line, encoded with orjson when available."""
+    FORMAT = 'ndjson'
+
+    def write(self, record: dict):
+        line = json_dumpb(record) + b'\n'
+        self._f.write(line)
+        self.count += 1
+
+class ArrowWriter(RecordWriter):
+    """Parquet or Arrow IPC file, written in record batches of `batch_size` rows (needs pyarrow).
+
+    The schema (union of keys, missing ones null) is inferred from the first batch. echo='full' prints records as NDJSON,
+    spooled to a temp file until close.
+    """
+    def __init__(self, path: str, fmt: str = 'parquet', echo: str = 'none', batch_size: int = 65_536):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ValueError(f"{fmt} output requires pyarrow")
+        self.FORMAT = fmt
+        super().__init__(path, echo)
+        self._pa = pyarrow
+        self._batch_size = batch_size
+        self._buf = []
+        self._writer = None
+        self._schema = None
+        self._spool = tempfile.TemporaryFile('w+', encoding='utf-8') if echo == 'full' else None
+
+    def write(self, record: dict):
+        self._buf.append(record)
+        if self.echo == 'full':
+            self._spool.write(json_dumpb(record).decode('utf-8') + '\n')
+        self.count += 1
+        if len(self._buf) >= self._batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buf:
+            return
+        pa = self._pa
+        names = self._schema.names if self._schema is not None else list(dict.fromkeys(k for r in self._buf for k in r))
+        table = pa.Table.from_pydict({k: [r.get(k) for r in self._buf] for k in names}, schema=self._schema)
+        if self._writer is None:
+            self._schema = table.schema
+            if self.FORMAT == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self._f, self._schema)
+            else:
+                self._writer = pa.ipc.new_file(self._f, self._schema)
+        self._writer.write_table(table)
+        self._buf = []
+
+    def _finish(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+
+    def _echo_full(self):
+        self._spool.seek(0)
+        _echo(self._spool)
+        self._close_spool()
+
+    def _close_spool(self):
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    def abort(self):
+        super().abort()
+        self._close_spool()
+
+def open_writer(output_dir: str, name: str, fmt: str = 'json', echo: str = 'none',
+                key: str = 'records', head: Head = None) -> RecordWriter:
+    """Writer for outputs/<dir>/<name>.<ext>; key/head only shape the 'json' document."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown output format {fmt}; expected one of {FORMATS}")
+    path = os.path.join(output_dir, name + EXTENSIONS[fmt])
+    if fmt == 'json':
+        return JSONWriter(path, key, head, echo)
+    if fmt == 'ndjson':
+        return NDJSONWriter(path, echo)
+    return ArrowWriter(path, fmt, echo)
+
+def write_json(path: str, doc: Any, echo: str = 'none'):
+    """Small single-document output: encoded once, written atomically, optionally echoed."""
+    text = json.dumps(doc, indent=2)
+    with atomic_open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    if echo == 'full':
+        _echo(text + '\n')
+    elif echo == 'summary':
+        _echo(json.dumps({'path': path, 'format': 'json', 'records': 1}) + '\n')
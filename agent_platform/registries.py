@@ -1,15 +1,64 @@
-import yaml, os
-from pydantic import BaseModel, ValidationError
-from typing import Dict
+import hashlib, importlib, json, os
+import yaml
+from pydantic import BaseModel, PrivateAttr, ValidationError
+from typing import Any, Callable, Dict, Optional, Tuple
+from .utils import atomic_open
 
 class RegistryError(Exception): pass
 
+# Parsed registries are snapshotted as JSON keyed on the YAML file's sha256,
+# and memoized in-process on (mtime, size), so repeated loads skip YAML parsing.
+CACHE_DIR_ENV = 'AGENT_PLATFORM_CACHE_DIR'
+_raw_cache: Dict[str, Tuple[tuple, dict]] = {}
+_spec_cache: Dict[Tuple[str, str], Tuple[tuple, dict]] = {}
+
+def _stamp(path: str) -> tuple:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+def _snapshot_path(path: str) -> str:
+    base = os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.dirname(os.path.abspath(path)), '.registry_cache')
+    return os.path.join(base, os.path.basename(path) + '.json')
+
+def _read_snapshot(snap_path: str, digest: str):
+    try:
+        with open(snap_path, 'r', encoding='utf-8') as f:
+            snap = json.load(f)
+        return snap['data'] if snap.get('sha256') == digest else None
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _write_snapshot(snap_path: str, digest: str, data: dict):
+    try:
+        with atomic_open(snap_path, 'w', encoding='utf-8') as f:
+            json.dump({'sha256': digest, 'data': data}, f)
+    except (OSError, TypeError, ValueError):
+        pass  # read-only checkout or non-JSON YAML: just parse next time
+
 def load_yaml(path: str) -> dict:
     if not os.path.exists(path):
         return {}
     with open(path, 'r', encoding='utf-8') as f:
         return yaml.safe_load(f) or {}
 
+def load_yaml_cached(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    stamp = _stamp(path)
+    hit = _raw_cache.get(path)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    with open(path, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    snap_path = _snapshot_path(path)
+    data = _read_snapshot(snap_path, digest)
+    if data is None:
+        data = yaml.safe_load(content) or {}
+        _write_snapshot(snap_path, digest, data)
+    _raw_cache[path] = (stamp, data)
+    return data
+
 def validate_registry(data: dict, name: str):
     if not isinstance(data, dict):
         raise RegistryError(f"{name} must be a dict")
@@ -18,32 +67,53 @@ class AgentSpec(BaseModel):
     id: str
     description: str = ""
     tools: list = []
-    memory_turns: int = 6
+    memory_turns: int = 6             # 0 switches agent memory off
+    memory_sample: float = 1.0        # fraction of turns kept, e.g. 0.1 keeps every 10th
+    memory_spill: Optional[str] = None  # JSONL file for turns pushed out of the window
 
 class ToolSpec(BaseModel):
     name: str
     impl: str
     input_schema: dict = {}
     output_schema: dict = {}
+    _fn: Any = PrivateAttr(default=None)
 
-def load_agents(path: str) -> Dict[str, AgentSpec]:
-    raw = load_yaml(path)
-    validate_registry(raw, "agents.yml")
-    out = {}
-    for k, v in raw.items():
-        try:
-            out[k] = AgentSpec(id=k, **(v or {}))
-        except ValidationError as e:
-            raise RegistryError(f"Invalid agent {k}: {e}")
+    def resolve(self) -> Callable:
+        # impl is imported on first use only, then kept on the spec
+        if self._fn is None:
+            module, _, attr = self.impl.rpartition('.')
+            try:
+                self._fn = getattr(importlib.import_module(module), attr)
+            except (ImportError, AttributeError, ValueError) as e:
+                raise RegistryError(f"Cannot resolve tool {self.name} ({self.impl}): {e}")
+        return self._fn
+
+def _load_specs(path: str, kind: str, build: Callable[[str, dict], Any]) -> dict:
+    stamp = _stamp(path) if os.path.exists(path) else None
+    key = (kind, os.path.abspath(path))
+    hit = _spec_cache.get(key)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    raw = load_yaml_cached(path)
+    validate_registry(raw, kind)
+    out = {k: build(k, v or {}) for k, v in raw.items()}
+    _spec_cache[key] = (stamp, out)
     return out
 
+def _agent_spec(k: str, v: dict) -> AgentSpec:
+    try:
+        return AgentSpec(id=k, **v)
+    except ValidationError as e:
+        raise RegistryError(f"Invalid agent {k}: {e}")
+
+def _tool_spec(k: str, v: dict) -> ToolSpec:
+    try:
+        return ToolSpec(name=k, **v)
+    except ValidationError as e:
+        raise RegistryError(f"Invalid tool {k}: {e}")
+
+def load_agents(path: str) -> Dict[str, AgentSpec]:
+    return _load_specs(path, "agents.yml", _agent_spec)
+
 def load_tools(path: str) -> Dict[str, ToolSpec]:
-    raw = load_yaml(path)
-    validate_registry(raw, "tools.yml")
-    out = {}
-    for k, v in raw.items():
-        try:
-            out[k] = ToolSpec(name=k, **(v or {}))
-        except ValidationError as e:
-            raise RegistryError(f"Invalid tool {k}: {e}")
-    return out
+    return _load_specs(path, "tools.yml", _tool_spec)
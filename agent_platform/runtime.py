@@ -0,0 +1,87 @@
+import functools, os, threading
+from typing import Any, Callable, Dict, Iterable, Optional
+from .orchestration import get_tracer
+from .registries import RegistryError, ToolSpec, load_tools
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_PATH = os.path.join(ROOT, 'tools.yml')
+AGENTS_PATH = os.path.join(ROOT, 'agents.yml')
+
+class ToolNotAllowedError(RegistryError): pass
+
+def trace_tool(fn: Callable, name: str) -> Callable:
+    # the active tracer is looked up per call, so enabling or disabling
+    # tracing applies to tools resolved at any time
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        tracer = get_tracer()
+        if tracer is None:
+            return fn(*args, **kwargs)
+        return tracer.call('tool', name, fn, *args, **kwargs)
+    return wrapper
+
+class ToolBox:
+    """Callables an agent may use, resolved once; lookups are plain dict hits."""
+    __slots__ = ('_fns', '_owner')
+
+    def __init__(self, fns: Dict[str, Callable], owner: str):
+        self._fns = fns
+        self._owner = owner
+
+    def __getitem__(self, name: str) -> Callable:
+        try:
+            return self._fns[name]
+        except KeyError:
+            raise ToolNotAllowedError(f"tool {name} is not allowed for {self._owner}")
+
+    def __getattr__(self, name: str) -> Callable:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._fns
+
+    def __reduce__(self):
+        # wrapped tools are closures; rebind by name in the receiving process
+        return (_rebind, (tuple(self._fns), self._owner))
+
+class ToolRuntime:
+    """Dispatches tool calls through tools.yml."""
+    def __init__(self, specs: Dict[str, ToolSpec]):
+        self.specs = specs
+        self._fns: Dict[str, Callable] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str = TOOLS_PATH) -> 'ToolRuntime':
+        return cls(load_tools(path))
+
+    def get(self, name: str) -> Callable:
+        fn = self._fns.get(name)
+        if fn is None:
+            spec = self.specs.get(name)
+            if spec is None:
+                raise RegistryError(f"Unknown tool {name}")
+            fn = trace_tool(spec.resolve(), name)
+            with self._lock:
+                fn = self._fns.setdefault(name, fn)
+        return fn
+
+    def call(self, name: str, *args, **kwargs) -> Any:
+        return self.get(name)(*args, **kwargs)
+
+    def bind(self, allowed: Iterable[str], owner: str = 'agent') -> ToolBox:
+        # tools missing from the registry are skipped here and rejected at lookup
+        return ToolBox({n: self.get(n) for n in allowed if n in self.specs}, owner)
+
+_default: Optional[ToolRuntime] = None
+
+def default_runtime() -> ToolRuntime:
+    global _default
+    if _default is None:
+        _default = ToolRuntime.from_file()
+    return _default
+
+def _rebind(names: tuple, owner: str) -> ToolBox:
+    return default_runtime().bind(names, owner)
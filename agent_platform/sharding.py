@@ -0,0 +1,230 @@
+import hashlib, heapq, os, socket, sqlite3, threading, time, zlib
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+import numpy as np
+from .batches import DictColumn
+from .utils import iter_jsonl
+
+# A sharded run splits one use case's input into n_shards by a stable hash
+# of its key column (account_id / borrower_id). Workers, in any number of
+# processes or on any host sharing the work directory, claim shards from a
+# SQLite queue and write one part file per shard plus a .done marker. The
+# merge step runs once every shard is done. Re-running the same command
+# resumes: finished shards are skipped, and shards held by a dead local
+# worker are claimed again. A running worker renews its lease while its
+# task runs, so an expired lease only matters for workers on other hosts
+# that stopped renewing it.
+ROLES = ('all', 'worker', 'merge')
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    job TEXT, shard INTEGER, status TEXT, worker TEXT, claimed_at REAL, attempts INTEGER DEFAULT 0,
+    PRIMARY KEY (job, shard)
+);
+"""
+
+class ShardError(RuntimeError):
+    pass
+
+def shard_of(key: Optional[str], n_shards: int) -> int:
+    # crc32 is stable across processes and hosts (unlike hash())
+    return zlib.crc32(key.encode('utf-8')) % n_shards if key is not None else 0
+
+def shard_index(column, n_shards: int) -> np.ndarray:
+    """Shard number of every row of a key column."""
+    if isinstance(column, DictColumn):
+        lut = np.fromiter((shard_of(v, n_shards) for v in column.values), dtype=np.int32, count=len(column.values))
+        if not len(lut):
+            return np.zeros(len(column), dtype=np.int32)
+        return np.where(column.codes >= 0, lut[np.maximum(column.codes, 0)], 0).astype(np.int32)
+    keys = column.tolist()
+    return np.fromiter((shard_of(k, n_shards) for k in keys), dtype=np.int32, count=len(keys))
+
+def shard_rows(column, shard: int, n_shards: int) -> np.ndarray:
+    # row positions (ascending) of one shard; kept with the results so the merge restores input order
+    return np.flatnonzero(shard_index(column, n_shards) == shard)
+
+def job_id(name: str, inputs: Sequence[str], n_shards: int) -> str:
+    # a changed input starts a new job instead of resuming over stale parts
+    h = hashlib.sha256(f'{name}:{n_shards}'.encode('utf-8'))
+    for path in inputs:
+        st = os.stat(path)
+        h.update(f':{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}'.encode('utf-8'))
+    return f'{name}-{n_shards}-{h.hexdigest()[:12]}'
+
+def part_path(job_dir: str, shard: int, ext: str) -> str:
+    return os.path.join(job_dir, f'part-{shard:05d}{ext}')
+
+def merge_parts(paths: Sequence[str], key: str = '_row') -> Iterator[dict]:
+    """Records of NDJSON parts, each sorted by `key`, in global `key` order (key removed)."""
+    for rec in heapq.merge(*(iter_jsonl(p) for p in paths), key=lambda r: r[key]):
+        del rec[key]
+        yield rec
+
+def _worker_alive(worker: Optional[str]) -> Optional[bool]:
+    # workers are "host:pid:n"; None when the owner is on another host and cannot be checked
+    host, _, rest = (worker or '').partition(':')
+    if host != socket.gethostname():
+        return None
+    try:
+        os.kill(int(rest.split(':')[0]), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return None
+    return True
+
+class ShardQueue:
+    """SQLite work queue of (job, shard) rows: pending -> running -> done.
+
+    claim() takes the write lock (BEGIN IMMEDIATE), so concurrent processes
+    never get the same shard. A running shard is claimable again once its
+    worker process on this host has exited, or, for owners that cannot be
+    checked, once its lease has not been renewed for `lease` seconds.
+    """
+    def __init__(self, path: str, timeout: float = 60.0):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._con = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._con.executescript(QUEUE_SCHEMA)
+
+    def plan(self, job: str, n_shards: int):
+        con = self._con
+        con.execute('BEGIN IMMEDIATE')
+        try:
+            con.executemany("INSERT OR IGNORE INTO shards (job, shard, status) VALUES (?, ?, 'pending')",
+                            ((job, s) for s in range(n_shards)))
+            con.execute('COMMIT')
+        except BaseException:
+            con.execute('ROLLBACK')
+            raise
+
+    def claim(self, job: str, worker: str, lease: float) -> Optional[int]:
+        con = self._con
+        now = time.time()
+        con.execute('BEGIN IMMEDIATE')
+        try:
+            rows = con.execute(
+                "SELECT shard, status, worker, claimed_at FROM shards WHERE job = ? AND status != 'done' ORDER BY shard",
+                (job,)).fetchall()
+            for shard, status, owner, claimed_at in rows:
+                alive = _worker_alive(owner) if status == 'running' else None
+                if status == 'pending' or alive is False or (alive is None and now - (claimed_at or 0) > lease):
+                    con.execute("UPDATE shards SET status = 'running', worker = ?, claimed_at = ?, attempts = attempts + 1 "
+                                "WHERE job = ? AND shard = ?", (worker, now, job, shard))
+                    con.execute('COMMIT')
+                    return shard
+            con.execute('COMMIT')
+            return None
+        except BaseException:
+            con.execute('ROLLBACK')
+            raise
+
+    def _set(self, job: str, shard: int, status: str):
+        self._con.execute("UPDATE shards SET status = ? WHERE job = ? AND shard = ?", (status, job, shard))
+
+    def complete(self, job: str, shard: int):
+        self._set(job, shard, 'done')
+
+    def release(self, job: str, shard: int):
+        self._set(job, shard, 'pending')
+
+    def renew(self, job: str, shard: int, worker: str):
+        self._con.execute("UPDATE shards SET claimed_at = ? WHERE job = ? AND shard = ? AND worker = ? AND status = 'running'",
+                          (time.time(), job, shard, worker))
+
+    def status(self, job: str) -> Dict[str, int]:
+        counts = {'pending': 0, 'running': 0, 'done': 0}
+        counts.update(self._con.execute("SELECT status, COUNT(*) FROM shards WHERE job = ? GROUP BY status", (job,)))
+        return counts
+
+    def close(self):
+        self._con.close()
+
+@contextmanager
+def _heartbeat(queue_path: str, job: str, shard: int, worker: str, interval: float):
+    # renews the lease from a side thread (own connection) while the task runs
+    stop = threading.Event()
+
+    def beat():
+        q = ShardQueue(queue_path)
+        try:
+            while not stop.wait(interval):
+                try:
+                    q.renew(job, shard, worker)
+                except sqlite3.Error:  # busy queue: try again next beat
+                    pass
+        finally:
+            q.close()
+
+    t = threading.Thread(target=beat, name=f'shard-{shard}-heartbeat', daemon=True)
+    t.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        t.join()
+
+def work(job: str, job_dir: str, queue_path: str, task: Callable, ext: str, lease: float, n: int = 0) -> int:
+    """Claim and run shards of `job` until none are left; returns the number this worker ran.
+
+    task(shard, part_path) must write part_path atomically. The .done marker
+    is written after it, and a shard whose marker exists is never re-run.
+    """
+    q = ShardQueue(queue_path)
+    worker = f'{socket.gethostname()}:{os.getpid()}:{n}'
+    ran = 0
+    try:
+        while (shard := q.claim(job, worker, lease)) is not None:
+            part = part_path(job_dir, shard, ext)
+            if not os.path.exists(part + '.done'):
+                try:
+                    with _heartbeat(queue_path, job, shard, worker, lease / 3):
+                        task(shard, part)
+                except BaseException:
+                    q.release(job, shard)
+                    raise
+                open(part + '.done', 'w').close()
+                ran += 1
+            q.complete(job, shard)
+    finally:
+        q.close()
+    return ran
+
+def run_sharded(name: str, inputs: Sequence[str], task: Callable, merge: Callable[[List[str]], Any],
+                n_shards: int, workdir: str, ext: str = '.ndjson', executor=None, workers: int = 1,
+                role: str = 'all', lease: float = 600.0) -> Any:
+    """Shard, work and merge one use case.
+
+    `task` is called as task(shard, part_path, n_shards=n_shards) (a
+    picklable function or partial for process workers), `merge` with the part paths in
+    shard order. role='worker' only works shards (extra processes or hosts
+    joining a run), 'merge' only merges a finished job, 'all' does both with
+    `workers` worker processes on `executor`.
+    """
+    if role not in ROLES:
+        raise ValueError(f"unknown shard role {role}; expected one of {ROLES}")
+    if n_shards < 1:
+        raise ValueError("n_shards must be >= 1")
+    job = job_id(name, inputs, n_shards)
+    job_dir = os.path.join(workdir, job)
+    os.makedirs(job_dir, exist_ok=True)
+    queue_path = os.path.join(workdir, 'queue.sqlite')
+    q = ShardQueue(queue_path)
+    try:
+        q.plan(job, n_shards)
+        if role != 'merge':
+            run = partial(work, job, job_dir, queue_path, partial(task, n_shards=n_shards), ext, lease)
+            if workers > 1 and executor is not None:
+                list(executor.map(run, range(workers)))
+            else:
+                run()
+        if role == 'worker':
+            return None
+        status = q.status(job)
+    finally:
+        q.close()
+    if status['done'] < n_shards:
+        raise ShardError(f"{job}: {n_shards - status['done']} of {n_shards} shards not done ({status})")
+    return merge([part_path(job_dir, s, ext) for s in range(n_shards)])
@@ -1,16 +1,36 @@
-from typing import List, Dict, Any
-import duckdb, re
+from typing import List, Dict, Any, Iterator, Optional
+from functools import lru_cache
+import csv, os, re, sys, threading
+import numpy as np
+from pydantic import TypeAdapter
 from .schemas import Transaction, BorrowerProfile, LoanInfo, RateInfo
+from .utils import iter_chunks, iter_jsonl
+from .db import get_pool
+from .colcache import cached_batch, cached_batches
+from .batches import TransactionBatch, LoanBatch, BorrowerBatch, RateBatch
+from .cache import code_version
+
+# ---- Loading helpers ----
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+@lru_cache(maxsize=None)
+def _list_adapter(model) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+def build_models(model, rows: List[dict], trusted: bool = False) -> list:
+    # trusted input skips validation; otherwise the whole batch is validated in one call
+    if trusted:
+        construct = model.model_construct
+        return [construct(**r) for r in rows]
+    return _list_adapter(model).validate_python(rows)
 
 # ---- Use Case A tools ----
 
-def load_transactions_csv(path: str) -> List[Transaction]:
-    import csv
-    rows = []
-    with open(path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            rows.append(Transaction(**{
+def _iter_csv_rows(path: str) -> Iterator[dict]:
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for r in csv.DictReader(f):
+            yield {
                 'id': r['id'],
                 'date': r['date'],
                 'description': r['description'],
@@ -19,8 +39,34 @@ def load_transactions_csv(path: str) -> List[Transaction]:
                 'type': r['type'],
                 'account_id': r['account_id'],
                 'category': r.get('category') or None
-            }))
-    return rows
+            }
+
+def iter_transactions_csv(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, trusted: bool = False) -> Iterator[List[Transaction]]:
+    for rows in iter_chunks(_iter_csv_rows(path), chunk_size):
+        yield build_models(Transaction, rows, trusted)
+
+def load_transactions_csv(path: str, trusted: bool = False) -> List[Transaction]:
+    return [t for chunk in iter_transactions_csv(path, trusted=trusted) for t in chunk]
+
+def _batch_parser(cls, read_rows):
+    # (path, chunk_size) -> validated chunks, one at a time
+    def parse(path: str, chunk_size: int) -> Iterator:
+        for rows in iter_chunks(read_rows(path), chunk_size):
+            yield cls.from_rows(rows)
+    return parse
+
+_parse_transactions = _batch_parser(TransactionBatch, _iter_csv_rows)
+_parse_borrowers = _batch_parser(BorrowerBatch, iter_jsonl)
+_parse_loans = _batch_parser(LoanBatch, iter_jsonl)
+_parse_rates = _batch_parser(RateBatch, iter_jsonl)
+
+def load_transaction_batch(path: str) -> TransactionBatch:
+    # parsed once per file version; see colcache
+    return cached_batch(TransactionBatch, path, _parse_transactions, DEFAULT_CHUNK_SIZE)
+
+def iter_transaction_batches(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[TransactionBatch]:
+    # streams on a cold cache; later runs read slices of the mapped columns
+    return cached_batches(TransactionBatch, path, _parse_transactions, chunk_size)
 
 MERCHANT_MAP = {
     'WHOLEFOODS': 'Groceries',
@@ -31,72 +77,197 @@ MERCHANT_MAP = {
     'RENT *': 'Rent',
 }
 
+# keyword fallbacks, checked in order after MERCHANT_MAP
+KEYWORD_RULES = [
+    (r'GROC(?:ERY|ERIES)?|MARKET', 'Groceries'),
+    (r'FUEL|GAS|SHELL|EXXON', 'Gas'),
+    (r'UBER|LYFT|TAXI', 'Transport'),
+    (r'RENT', 'Rent'),
+    (r'NETFLIX|SPOTIFY|HULU', 'Entertainment'),
+]
+
+class Categorizer:
+    """Single-pass categorizer compiled once from a merchant map and keyword rules.
+
+    Every rule becomes one capture group inside a zero-width lookahead, so a
+    scan reports the highest-precedence rule starting at each position; the
+    lowest group index over the whole string is the rule the old chain of
+    checks would have picked. Results are memoized per normalized key.
+    """
+    def __init__(self, merchant_map: Dict[str, str], keyword_rules: List[tuple], max_cache: int = 100_000):
+        frags, cats = [], []
+        for pat, cat in merchant_map.items():
+            if pat.endswith('*'):
+                frags.append('^' + re.escape(pat[:-1]))
+                cats.append(cat)
+            frags.append(re.escape(pat))
+            cats.append(cat)
+        for rx, cat in keyword_rules:
+            frags.append(rx)
+            cats.append(cat)
+        self._rx = re.compile('(?=' + '|'.join(f'({f})' for f in frags) + ')')
+        self._cats = cats
+        self._cache: Dict[str, str] = {}
+        self._max_cache = max_cache
+
+    def _match(self, key: str) -> str:
+        best = None
+        for m in self._rx.finditer(key):
+            if best is None or m.lastindex < best:
+                best = m.lastindex
+                if best == 1:
+                    break
+        return self._cats[best - 1] if best else 'Other'
+
+    def categorize_key(self, key: str) -> str:
+        cat = self._cache.get(key)
+        if cat is None:
+            cat = self._match(key)
+            if len(self._cache) >= self._max_cache:
+                self._cache.clear()
+            self._cache[key] = cat
+        return cat
+
+    def categorize(self, tx: Transaction) -> str:
+        return self.categorize_key((tx.merchant or tx.description or '').upper())
+
+    def categorize_many(self, transactions: List[Transaction]) -> List[str]:
+        get, lookup = self._cache.get, self.categorize_key
+        out = []
+        for tx in transactions:
+            key = (tx.merchant or tx.description or '').upper()
+            cat = get(key)
+            out.append(cat if cat is not None else lookup(key))
+        return out
+
+    def categorize_batch(self, batch: TransactionBatch) -> TransactionBatch:
+        # fills missing categories; merchants are categorized once per dictionary value
+        cat_col = batch.category
+        missing = (cat_col.codes < 0) | (cat_col.codes == cat_col.code_of(''))
+        if not missing.any():
+            return batch
+        merchant = batch.merchant[missing]
+        by_code = {c: self.categorize_key(merchant.values[c].upper())
+                   for c in np.unique(merchant.codes).tolist() if c >= 0 and merchant.values[c]}
+        cats = [
+            by_code.get(c) or self.categorize_key((d or '').upper())
+            for c, d in zip(merchant.codes.tolist(), batch.description[missing].tolist())
+        ]
+        return type(batch)({**batch.columns, 'category': cat_col.fill(missing, cats)})
+
+_categorizer = Categorizer(MERCHANT_MAP, KEYWORD_RULES)
+
 def categorize(tx: Transaction) -> str:
-    desc = (tx.merchant or tx.description or '').upper()
-    for pat, cat in MERCHANT_MAP.items():
-        if pat.endswith('*'):
-            if desc.startswith(pat[:-1]):
-                return cat
-        if pat in desc:
-            return cat
-    if re.search(r'GROC(ERY|ERIES)?|MARKET', desc):
-        return 'Groceries'
-    if re.search(r'FUEL|GAS|SHELL|EXXON', desc):
-        return 'Gas'
-    if re.search(r'UBER|LYFT|TAXI', desc):
-        return 'Transport'
-    if re.search(r'RENT', desc):
-        return 'Rent'
-    if re.search(r'NETFLIX|SPOTIFY|HULU', desc):
-        return 'Entertainment'
-    return 'Other'
+    return _categorizer.categorize(tx)
 
-def budget_insights(transactions: List[Transaction]) -> Dict[str, Any]:
-    import pandas as pd, duckdb
-    df = pd.DataFrame([t.model_dump() for t in transactions])
-    if 'category' not in df.columns:
-        df['category'] = None
-    df['category'] = df['category'].fillna('Unknown')
-    # debit == spend (credits treated as 0)
-    df['spend'] = df.apply(lambda r: r['amount'] if r['type'] == 'debit' else 0.0, axis=1)
-
-    con = duckdb.connect()
-    cat = con.execute("""
-        SELECT category, ROUND(SUM(spend), 2) AS total_spend, COUNT(*) AS n
-        FROM df
-        GROUP BY category
-        ORDER BY total_spend DESC
-    """).fetchdf().to_dict(orient='records')
-
-    top_merchants = con.execute("""
-        SELECT
-          COALESCE(merchant, description) AS merchant,
-          ROUND(SUM(spend), 2) AS total_spend
-        FROM df
-        GROUP BY COALESCE(merchant, description)
-        ORDER BY total_spend DESC
-        LIMIT 5
-    """).fetchdf().to_dict(orient='records')
-
-    recurring = con.execute("""
-        SELECT
-          COALESCE(merchant, description) AS merchant,
-          COUNT(*) AS hits
-        FROM df
-        GROUP BY COALESCE(merchant, description)
-        HAVING COUNT(*) >= 2
-        ORDER BY hits DESC
-    """).fetchdf().to_dict(orient='records')
+def categorize_many(transactions: List[Transaction]) -> List[str]:
+    return _categorizer.categorize_many(transactions)
+
+def categorize_batch(batch: TransactionBatch) -> TransactionBatch:
+    return _categorizer.categorize_batch(batch)
 
+def transaction_columns(transactions: List[Transaction]) -> Dict[str, np.ndarray]:
+    if isinstance(transactions, TransactionBatch):
+        b = transactions
+        merchant = b.merchant.decode()
+        no_merchant = b.merchant.codes < 0
+        merchant[no_merchant] = b.description[no_merchant]
+        return {
+            'category': b.category.decode('Unknown'),
+            'merchant': merchant,
+            'spend': np.where(b.type.codes == b.type.code_of('debit'), b.amount, 0.0),
+        }
+    n = len(transactions)
+    amount = np.fromiter((t.amount for t in transactions), dtype=np.float64, count=n)
+    is_debit = np.fromiter((t.type == 'debit' for t in transactions), dtype=bool, count=n)
+    return {
+        'category': np.array([t.category if t.category is not None else 'Unknown' for t in transactions], dtype=object),
+        'merchant': np.array([t.merchant if t.merchant is not None else t.description for t in transactions], dtype=object),
+        # debit == spend (credits treated as 0)
+        'spend': np.where(is_debit, amount, 0.0),
+    }
+
+INSIGHTS_SQL = """
+    SELECT GROUPING(category) AS by_merchant, category, merchant,
+           SUM(spend) AS total_spend, COUNT(*) AS n
+    FROM txs
+    GROUP BY GROUPING SETS ((category), (merchant))
+"""
+
+def budget_groups(transactions: List[Transaction]) -> List[tuple]:
+    # unrounded (by_merchant, category, merchant, total_spend, n) rows; mergeable across chunks
+    if not transactions:
+        return []
+    with get_pool().registered('txs', transaction_columns(transactions)) as cur:
+        return cur.execute(INSIGHTS_SQL).fetchall()
+
+def merge_groups(*group_lists: List[tuple]) -> List[tuple]:
+    acc = {}
+    for rows in group_lists:
+        for g, c, m, s, n in rows:
+            prev = acc.get((g, c, m))
+            acc[(g, c, m)] = (prev[0] + s, prev[1] + n) if prev else (s, n)
+    return [(g, c, m, s, n) for (g, c, m), (s, n) in acc.items()]
+
+def insights_from_groups(rows: List[tuple]) -> Dict[str, Any]:
+    cat = [{'category': c, 'total_spend': round(s, 2), 'n': n} for g, c, _, s, n in rows if not g]
+    merchants = [(m, round(s, 2), n) for g, _, m, s, n in rows if g]
+    cat.sort(key=lambda r: r['total_spend'], reverse=True)
+    top_merchants = [{'merchant': m, 'total_spend': s} for m, s, _ in sorted(merchants, key=lambda r: r[1], reverse=True)[:5]]
+    recurring = [{'merchant': m, 'hits': n} for m, _, n in sorted(merchants, key=lambda r: r[2], reverse=True) if n >= 2]
     return {
         'by_category': cat,
         'top_merchants': top_merchants,
         'possible_recurring': recurring
     }
 
+def budget_insights(transactions: List[Transaction]) -> Dict[str, Any]:
+    return insights_from_groups(budget_groups(transactions))
+
+def _versioned(modules: tuple) -> tuple:
+    # this module plus the schemas, column batches and DuckDB pool its results go through
+    own = (__name__, Transaction.__module__, TransactionBatch.__module__, get_pool.__module__)
+    return tuple(sys.modules[m] for m in own) + modules
+
+def categorize_version(*modules) -> str:
+    # result-cache version of graphs built on these tools and merchant tables
+    return code_version(_versioned(modules), merchant_map=MERCHANT_MAP, keyword_rules=KEYWORD_RULES)
+
 
 # ---- Use Case B tools ----
 
+PREQUAL_TERM_MONTHS = 360
+TARGET_DTI = 0.36
+MAX_DTI = 0.43
+MIN_FICO = 620
+MAX_LTV = 0.97
+REQUIRED_DOCS = ['Pay stubs', 'W-2', 'Bank statements']
+
+def prequal_version(*modules) -> str:
+    # result-cache version of graphs built on these tools and policy thresholds
+    return code_version(
+        _versioned(modules), term_months=PREQUAL_TERM_MONTHS, target_dti=TARGET_DTI,
+        max_dti=MAX_DTI, min_fico=MIN_FICO, max_ltv=MAX_LTV, required_docs=REQUIRED_DOCS,
+    )
+
+@lru_cache(maxsize=4096)
+def amortization_growth(annual_rate: float, term_months: int = PREQUAL_TERM_MONTHS) -> float:
+    # (1+r)**n, shared by every borrower quoted at the same rate
+    return (1 + annual_rate/12) ** term_months
+
+def _mortgage_payment(loan: float, annual_rate: float) -> float:
+    r = annual_rate/12
+    if r == 0:
+        return loan / PREQUAL_TERM_MONTHS
+    g = amortization_growth(annual_rate)
+    return loan * (r*g)/(g-1)
+
+def _max_principal(allowable: float, annual_rate: float) -> float:
+    r = annual_rate/12
+    if r == 0: return 0.0
+    g = amortization_growth(annual_rate)
+    return round(allowable * ((g - 1)/(r*g)), 2)
+
 def compute_dti(profile: BorrowerProfile) -> float:
     piti = compute_piti(profile)
     monthly = profile.debts_monthly + piti
@@ -108,45 +279,135 @@ def compute_ltv(profile: BorrowerProfile) -> float:
 
 def compute_piti(profile: BorrowerProfile) -> float:
     loan = profile.home_price - profile.down_payment
-    r = profile.interest_rate/12
-    n = 360
-    m = loan * (r*(1+r)**n)/(((1+r)**n)-1)
+    m = _mortgage_payment(loan, profile.interest_rate)
     return round(m + profile.prop_tax_monthly + profile.insurance_monthly, 2)
 
-def policy_check(profile: BorrowerProfile) -> Dict[str, Any]:
+def max_loan_estimate(profile: BorrowerProfile) -> float:
+    allowable = max(profile.income_monthly * TARGET_DTI - profile.debts_monthly, 0)
+    return _max_principal(allowable, profile.interest_rate)
+
+class PrequalContext:
+    """Loan amount, PITI, DTI, LTV and max loan computed once per profile.
+
+    Planner and compliance steps share one instance instead of each calling
+    compute_dti / compute_ltv again.
+    """
+    __slots__ = ('profile', 'loan', 'piti', 'dti', 'ltv', 'max_loan')
+
+    def __init__(self, profile: BorrowerProfile):
+        self.profile = profile
+        self.loan = profile.home_price - profile.down_payment
+        m = _mortgage_payment(self.loan, profile.interest_rate)
+        self.piti = round(m + profile.prop_tax_monthly + profile.insurance_monthly, 2)
+        self.dti = round((profile.debts_monthly + self.piti) / max(profile.income_monthly, 1), 4)
+        self.ltv = round(self.loan / max(profile.home_price, 1), 4)
+        self.max_loan = max_loan_estimate(profile)
+
+    def calc(self) -> Dict[str, float]:
+        return {'dti': self.dti, 'ltv': self.ltv, 'max_loan': self.max_loan}
+
+def policy_flags(dti: float, ltv: float, fico: int) -> List[str]:
     flags = []
-    if compute_dti(profile) > 0.43:
+    if dti > MAX_DTI:
         flags.append('DTI>43%')
-    if profile.fico < 620:
+    if fico < MIN_FICO:
         flags.append('LowFICO')
-    if compute_ltv(profile) > 0.97:
+    if ltv > MAX_LTV:
         flags.append('HighLTV')
-    return {'flags': flags, 'docs': ['Pay stubs', 'W-2', 'Bank statements']}
+    return flags
 
-def max_loan_estimate(profile: BorrowerProfile) -> float:
-    target_dti = 0.36
-    allowable = max(profile.income_monthly * target_dti - profile.debts_monthly, 0)
-    r = profile.interest_rate/12
-    n = 360
-    if r == 0: return 0.0
-    principal = allowable * (((1+r)**n - 1)/(r*(1+r)**n))
-    return round(principal, 2)
+def policy_check(profile: BorrowerProfile, ctx: PrequalContext = None) -> Dict[str, Any]:
+    dti = ctx.dti if ctx is not None else compute_dti(profile)
+    ltv = ctx.ltv if ctx is not None else compute_ltv(profile)
+    return {'flags': policy_flags(dti, ltv, profile.fico), 'docs': list(REQUIRED_DOCS)}
+
+def round_batch(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """np.round that agrees with builtin round() element for element.
+
+    np.round scales, rounds half-even and scales back, so near a .5 tie it can
+    pick the other neighbour than round(), which rounds the exact binary value.
+    Only those near-tie elements are redone with round().
+    """
+    out = np.round(values, ndigits)
+    if not values.size:
+        return out
+    scale = 10.0 ** ndigits
+    with np.errstate(invalid='ignore'):
+        off = values - out  # exact: out is within half a unit of values
+    off *= scale
+    np.abs(off, out=off)
+    tol = max(values.max(), -values.min()) * scale * 1e-15
+    if not np.isfinite(tol):
+        finite = values[np.isfinite(values)]
+        tol = np.abs(finite).max() * scale * 1e-15 if finite.size else 0.0
+    near = np.flatnonzero(off >= 0.5 - tol)
+    if near.size:
+        out[near] = [round(v, ndigits) for v in values[near].tolist()]
+    return out
+
+def prequal_batch(profiles: List[BorrowerProfile]) -> Dict[str, np.ndarray]:
+    """Vectorized PrequalContext + policy flags for a whole borrower file (list or BorrowerBatch)."""
+    n = len(profiles)
+    if isinstance(profiles, BorrowerBatch):
+        col = lambda f: profiles.columns[f].astype(np.float64)
+    else:
+        col = lambda f: np.fromiter((getattr(p, f) for p in profiles), dtype=np.float64, count=n)
+    income, debts, price = col('income_monthly'), col('debts_monthly'), col('home_price')
+    fico, rate = col('fico'), col('interest_rate')
+    loan = price - col('down_payment')
+    r = rate / 12
+    zero = r == 0
+    safe_r = np.where(zero, 1.0, r)
+    # builtin pow once per distinct rate, as the per-record path (numpy's can differ
+    # in the last bit); 12.0 is the annual rate behind safe_r == 1
+    rates, inverse = np.unique(np.where(zero, 12.0, rate), return_inverse=True)
+    g = np.array([amortization_growth(x) for x in rates.tolist()])[inverse]
+    payment = np.where(zero, loan / PREQUAL_TERM_MONTHS, loan * (safe_r*g)/(g-1))
+    piti = round_batch(payment + col('prop_tax_monthly') + col('insurance_monthly'), 2)
+    dti = round_batch((debts + piti) / np.maximum(income, 1), 4)
+    ltv = round_batch(loan / np.maximum(price, 1), 4)
+    allowable = np.maximum(income * TARGET_DTI - debts, 0)
+    max_loan = np.where(zero, 0.0, round_batch(allowable * ((g - 1)/(safe_r*g)), 2))
+    return {
+        'loan': loan, 'piti': piti, 'dti': dti, 'ltv': ltv, 'max_loan': max_loan,
+        'dti_flag': dti > MAX_DTI, 'fico_flag': fico < MIN_FICO, 'ltv_flag': ltv > MAX_LTV,
+    }
+
+def load_borrower_batch(path: str) -> BorrowerBatch:
+    return cached_batch(BorrowerBatch, path, _parse_borrowers, DEFAULT_CHUNK_SIZE)
+
+def iter_borrower_batches(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[BorrowerBatch]:
+    return cached_batches(BorrowerBatch, path, _parse_borrowers, chunk_size)
+
+def policy_flags_batch(batch: Dict[str, np.ndarray]) -> List[List[str]]:
+    names = (('dti_flag', 'DTI>43%'), ('fico_flag', 'LowFICO'), ('ltv_flag', 'HighLTV'))
+    cols = [batch[k].tolist() for k, _ in names]
+    return [[label for (_, label), hit in zip(names, hits) if hit] for hits in zip(*cols)]
 
 # ---- Use Case C tools (Refi) ----
 
-def load_loans_jsonl(path: str) -> List[LoanInfo]:
-    rows = []
-    with open(path, 'r', encoding='utf-8') as f:
-        for line in f:
-            rows.append(LoanInfo(**__import__('json').loads(line)))
-    return rows
+def iter_loans_jsonl(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, trusted: bool = False) -> Iterator[List[LoanInfo]]:
+    for rows in iter_chunks(iter_jsonl(path), chunk_size):
+        yield build_models(LoanInfo, rows, trusted)
+
+def iter_rates_jsonl(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, trusted: bool = False) -> Iterator[List[RateInfo]]:
+    for rows in iter_chunks(iter_jsonl(path), chunk_size):
+        yield build_models(RateInfo, rows, trusted)
+
+def load_loan_batch(path: str) -> LoanBatch:
+    return cached_batch(LoanBatch, path, _parse_loans, DEFAULT_CHUNK_SIZE)
 
-def load_rates_jsonl(path: str) -> List[RateInfo]:
-    rows = []
-    with open(path, 'r', encoding='utf-8') as f:
-        for line in f:
-            rows.append(RateInfo(**__import__('json').loads(line)))
-    return rows
+def iter_loan_batches(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[LoanBatch]:
+    return cached_batches(LoanBatch, path, _parse_loans, chunk_size)
+
+def load_rate_batch(path: str) -> RateBatch:
+    return cached_batch(RateBatch, path, _parse_rates, DEFAULT_CHUNK_SIZE)
+
+def load_loans_jsonl(path: str, trusted: bool = False) -> List[LoanInfo]:
+    return [l for chunk in iter_loans_jsonl(path, trusted=trusted) for l in chunk]
+
+def load_rates_jsonl(path: str, trusted: bool = False) -> List[RateInfo]:
+    return [r for chunk in iter_rates_jsonl(path, trusted=trusted) for r in chunk]
 
 def monthly_payment(principal: float, annual_rate: float, term_months: int) -> float:
     if annual_rate == 0:
@@ -161,5 +422,159 @@ def calculate_savings(loan: LoanInfo, market_rate: float) -> float:
     new_pmt = monthly_payment(loan.loan_balance, market_rate, loan.remaining_term_months)
     return round(current_pmt - new_pmt, 2)
 
+def monthly_payment_batch(principal, annual_rate, term_months) -> np.ndarray:
+    principal = np.asarray(principal, dtype=np.float64)
+    r = np.asarray(annual_rate, dtype=np.float64) / 12
+    n = np.asarray(term_months, dtype=np.float64)
+    zero = r == 0
+    safe_r = np.where(zero, 1.0, r)
+    growth = (1 + safe_r) ** n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m = principal * (safe_r * growth) / (growth - 1)
+    return np.where(zero, principal / np.maximum(n, 1), m)
+
+def calculate_savings_batch(balances, current_rates, terms, market_rate) -> np.ndarray:
+    # vectorized calculate_savings; market_rate may be a scalar or broadcastable array
+    current_pmt = monthly_payment_batch(balances, current_rates, terms)
+    new_pmt = monthly_payment_batch(balances, market_rate, terms)
+    return np.round(current_pmt - new_pmt, 2)
+
+def breakeven_rates(balances, current_rates, terms, threshold: float = 150.0, iterations: int = 64) -> np.ndarray:
+    """Highest market rate at which each loan still alerts (calculate_savings_batch >= threshold).
+
+    Savings fall as the market rate rises, so the alert holds exactly for
+    market rates <= the returned rate. Found by bisection on the alert itself,
+    so the 2-decimal rounding of savings is honoured. -inf: never alerts for a
+    rate >= 0; inf: alerts even at a 100% rate.
+    """
+    balances = np.asarray(balances, dtype=np.float64)
+    current_rates = np.asarray(current_rates, dtype=np.float64)
+    terms = np.asarray(terms, dtype=np.float64)
+    alerts = lambda rate: calculate_savings_batch(balances, current_rates, terms, rate) >= threshold
+    lo = np.zeros(len(balances))
+    hi = np.ones(len(balances))
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        hit = alerts(mid)
+        lo = np.where(hit, mid, lo)
+        hi = np.where(hit, hi, mid)
+    out = np.where(alerts(lo), lo, -np.inf)
+    return np.where(alerts(np.ones(len(balances))), np.inf, out)
+
+class RateCurve:
+    """Rate quotes indexed by (date, term) in sorted arrays; built once per rates file.
+
+    Rows are ordered by date, then term, so everything quoted up to a date
+    is a prefix of the arrays. curve() gives per-term rates as of a date,
+    either the best quote seen ('best') or the most recent one ('latest');
+    rate() interpolates linearly for terms that are not quoted, holding the
+    end rates flat outside the quoted range.
+    """
+    __slots__ = ('dates', 'date_idx', 'terms', 'rates', '_curves')
+
+    def __init__(self, dates, terms, rates):
+        dates, date_idx = np.unique(np.asarray(dates, dtype=str), return_inverse=True)
+        terms = np.asarray(terms, dtype=np.int64)
+        rates = np.asarray(rates, dtype=np.float64)
+        order = np.lexsort((rates, terms, date_idx))
+        self.dates = dates
+        self.date_idx = date_idx.reshape(-1)[order]
+        self.terms = terms[order]
+        self.rates = rates[order]
+        self._curves: Dict[tuple, tuple] = {}
+
+    @classmethod
+    def from_batch(cls, batch: RateBatch) -> 'RateCurve':
+        return cls(batch.date.decode(), batch.term_months, batch.rate)
+
+    @classmethod
+    def from_rates(cls, rates: list) -> 'RateCurve':
+        # RateInfo models or plain dicts
+        if rates and isinstance(rates[0], dict):
+            return cls.from_batch(RateBatch.from_rows(rates))
+        return cls.from_batch(RateBatch.from_models(rates))
+
+    @classmethod
+    def load(cls, path: str) -> 'RateCurve':
+        return cls.from_batch(load_rate_batch(path))
+
+    def __len__(self) -> int:
+        return len(self.rates)
+
+    def _prefix(self, as_of: Optional[str]) -> int:
+        if as_of is None:
+            return len(self.rates)
+        k = int(np.searchsorted(self.dates, as_of, side='right'))
+        return int(np.searchsorted(self.date_idx, k, side='left'))
+
+    def curve(self, as_of: Optional[str] = None, how: str = 'best') -> tuple:
+        """(terms, rates) arrays, one entry per quoted term, from quotes dated <= as_of."""
+        n = self._prefix(as_of)
+        hit = self._curves.get((n, how))
+        if hit is None:
+            t, d, r = self.terms[:n], self.date_idx[:n], self.rates[:n]
+            if how == 'latest':
+                order = np.lexsort((r, -d, t))
+            elif how == 'best':
+                order = np.lexsort((r, t))
+            else:
+                raise ValueError(f"unknown curve {how}; expected 'best' or 'latest'")
+            t, r = t[order], r[order]
+            first = np.flatnonzero(np.r_[True, t[1:] != t[:-1]]) if n else np.zeros(0, dtype=np.int64)
+            hit = self._curves[(n, how)] = (t[first], r[first])
+        return hit
+
+    def best_by_term(self, as_of: Optional[str] = None) -> Dict[int, float]:
+        terms, rates = self.curve(as_of, 'best')
+        return dict(zip(terms.tolist(), rates.tolist()))
+
+    def rates_for(self, terms, as_of: Optional[str] = None, how: str = 'best') -> np.ndarray:
+        known_terms, known_rates = self.curve(as_of, how)
+        if not len(known_terms):
+            raise ValueError(f"no rates quoted as of {as_of}")
+        return np.interp(np.asarray(terms, dtype=np.float64), known_terms, known_rates)
+
+    def rate(self, term_months: int, as_of: Optional[str] = None, how: str = 'best') -> float:
+        return float(self.rates_for(term_months, as_of, how))
+
+    def min_rate(self, as_of: Optional[str] = None) -> float:
+        n = self._prefix(as_of)
+        if not n:
+            raise ValueError(f"no rates quoted as of {as_of}")
+        return float(self.rates[:n].min())
+
+    def market_rate(self, term_months: Optional[int] = None, as_of: Optional[str] = None) -> float:
+        # no as_of: best quote over the whole file; with as_of: the latest curve on that date
+        if not term_months:
+            return self.min_rate(as_of)
+        return self.rate(term_months, as_of, 'best' if as_of is None else 'latest')
+
+_rate_curves: Dict[str, tuple] = {}
+_rate_curves_lock = threading.Lock()
+
+def rate_curve(path: str) -> RateCurve:
+    """Shared RateCurve for a rates file; rebuilt only when the file's mtime or size changes."""
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    key = os.path.abspath(path)
+    hit = _rate_curves.get(key)
+    if hit is None or hit[0] != stamp:
+        curve = RateCurve.load(path)
+        with _rate_curves_lock:
+            _rate_curves[key] = hit = (stamp, curve)
+    return hit[1]
+
+def refi_sweep(balances, current_rates, terms, scenario_terms, scenario_rates):
+    """Savings for every loan x (term, rate) scenario; returns best scenario index and savings per loan.
+
+    The new payment amortizes the current balance over the scenario term.
+    """
+    balances = np.asarray(balances, dtype=np.float64)
+    current = monthly_payment_batch(balances, current_rates, terms)
+    new = monthly_payment_batch(balances[:, None], np.asarray(scenario_rates)[None, :], np.asarray(scenario_terms)[None, :])
+    savings = np.round(current[:, None] - new, 2)
+    best = savings.argmax(axis=1)
+    return best, savings[np.arange(len(balances)), best]
+
 def should_alert(monthly_savings: float, threshold: float = 150.0) -> bool:
     return monthly_savings >= threshold
@@ -1,10 +1,57 @@
-import time, json, os
-from typing import Any
+import time, json, os, uuid
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Iterable, Iterator, List
+
+# sentinel for cache misses; lives here so importing it stays cheap
+MISSING = object()
+
+try:  # optional faster codec
+    import orjson
+    json_loads = orjson.loads
+    def json_dumpb(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    json_loads = json.loads
+    def json_dumpb(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
 
 def now_ms() -> int:
     return int(time.time() * 1000)
 
+def temp_path(path: str) -> str:
+    # unique per writer, not just per process: thread workers share a pid
+    return f'{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp'
+
+@contextmanager
+def atomic_open(path: str, mode: str = 'w', **kwargs):
+    # write to a temp file next to path; rename into place only if the block succeeds
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = temp_path(path)
+    f = open(tmp, mode, **kwargs)
+    try:
+        yield f
+        f.close()
+        os.replace(tmp, path)
+    except BaseException:
+        f.close()
+        os.remove(tmp)
+        raise
+
 def dump_json(path: str, obj: Any):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w', encoding='utf-8') as f:
+    with atomic_open(path, 'w', encoding='utf-8') as f:
         json.dump(obj, f, indent=2)
+
+def iter_chunks(items: Iterable, size: int) -> Iterator[List]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_jsonl(path: str) -> Iterator[dict]:
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield json_loads(line)
@@ -0,0 +1,216 @@
+"""Benchmark the hot paths of the three use cases on seeded synthetic data.
+
+    python -m benchmarks --scale 1e5                # report only
+    python -m benchmarks --scale 1e5 --save-baseline
+    python -m benchmarks --scale 1e5 --check        # exit 1 on regression vs baseline
+
+Inputs are built on first use by a selected case: batch cases read the
+generated files through the column cache, and the scalar per-model cases
+run on at most --scalar-cap rows.
+"""
+import argparse, asyncio, contextlib, gc, io, json, os, sys, tempfile, time, tracemalloc
+from collections import Counter
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+from agent_platform import tools
+from agent_platform.schemas import Transaction, BorrowerProfile, LoanInfo
+from . import generators as gen
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+class Inputs:
+    """Datasets for the cases, built on first use; release() drops one once no selected case needs it."""
+    def __init__(self, n: int, seed: int, workdir: str, scalar_cap: int):
+        self.n = n
+        self.m = min(n, scalar_cap)
+        self.seed = seed
+        self.workdir = workdir
+        self.out = os.path.join(workdir, 'out')
+        self._paths: Dict[str, str] = {}
+        self._data: Dict[str, Any] = {}
+
+    def path(self, name: str) -> str:
+        if name not in self._paths:
+            path = os.path.join(self.workdir, 'transactions.csv' if name == 'transactions' else f'{name}.jsonl')
+            if name == 'transactions':
+                gen.write_transactions_csv(path, gen.transaction_rows(self.n, self.seed))
+            elif name == 'rates':
+                gen.write_jsonl(path, gen.rate_rows(seed=self.seed))
+            else:
+                gen.write_jsonl(path, getattr(gen, f'{name[:-1]}_rows')(self.n, self.seed))
+            self._paths[name] = path
+        return self._paths[name]
+
+    def _build(self, key: str):
+        m, seed = self.m, self.seed
+        if key == 'transactions':
+            return tools.build_models(Transaction, list(gen.transaction_rows(m, seed)), trusted=True)
+        if key == 'profiles':
+            return tools.build_models(BorrowerProfile, list(gen.borrower_rows(m, seed)), trusted=True)
+        if key == 'loans':
+            return tools.build_models(LoanInfo, list(gen.loan_rows(m, seed)), trusted=True)
+        if key == 'requests':
+            return [{'profile': x} for x in self.get('profiles')]
+        if key == 'tx_batch':
+            return tools.load_transaction_batch(self.path('transactions'))
+        if key == 'borrower_batch':
+            return tools.load_borrower_batch(self.path('borrowers'))
+        if key == 'loan_batch':
+            return tools.load_loan_batch(self.path('loans'))
+        raise KeyError(key)
+
+    def get(self, key: Optional[str]):
+        if key is None:
+            return None
+        if key not in self._data:
+            self._data[key] = self._build(key)
+        return self._data[key]
+
+    def release(self, key: Optional[str]):
+        self._data.pop(key, None)
+
+def _cold_categorize(fn: Callable) -> Callable:
+    def run(arg):
+        tools._categorizer._cache.clear()
+        return fn(arg)
+    return run
+
+def _concurrent(invoke: Callable) -> Callable:
+    # n requests arriving together on one event loop; invoke is async (state) -> result
+    async def fire(states):
+        return await asyncio.gather(*(invoke(s) for s in states))
+    return lambda states: asyncio.run(fire(states))
+
+def cases(data: Inputs) -> Dict[str, Tuple[Callable, Optional[str]]]:
+    """name -> (callable taking the input, input key in Inputs). Scalar cases take at most scalar_cap rows."""
+    from usecases.transaction_classifier_budget import module as mod_a
+    from usecases.mortgage_prequal_advisor import module as mod_b
+    from usecases.mortgage_rate_monitoring import module as mod_c
+    from usecases.mortgage_rate_monitoring import api as prequal_api  # serves the mortgage-prequal graph code
+    from agent_platform.batching import GraphFrontend
+    from agent_platform.orchestration import LocalGraph
+    local = LocalGraph(prequal_api.NODES)
+
+    async def invoke_one(state):
+        return local.invoke(state)
+
+    frontend = GraphFrontend({'prequal': prequal_api.batch_invoke}, max_batch=256, window_ms=1.0)
+    out, path = data.out, data.path
+
+    def pipeline(fn, **paths):
+        # input files are written on first call (the untimed warm-up)
+        def run(_):
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn(output_dir=out, **{k: path(v) for k, v in paths.items()})
+        return run
+
+    return {
+        'categorize_many': (_cold_categorize(tools.categorize_many), 'transactions'),
+        'categorize_batch': (_cold_categorize(tools.categorize_batch), 'tx_batch'),
+        'budget_insights': (tools.budget_insights, 'transactions'),
+        'budget_insights_batch': (tools.budget_insights, 'tx_batch'),
+        'prequal_context': (lambda ps: [tools.PrequalContext(x) for x in ps], 'profiles'),
+        'prequal_batch': (tools.prequal_batch, 'borrower_batch'),
+        'prequal_requests': (_concurrent(invoke_one), 'requests'),
+        'prequal_requests_batched': (_concurrent(partial(frontend.ainvoke, 'prequal')), 'requests'),
+        'calculate_savings': (lambda ls: [tools.calculate_savings(l, 0.055) for l in ls], 'loans'),
+        'calculate_savings_batch': (
+            lambda b: tools.calculate_savings_batch(b.loan_balance, b.current_rate, b.remaining_term_months, 0.055),
+            'loan_batch'),
+        'pipeline_a': (pipeline(mod_a.run, data_path='transactions'), None),
+        'pipeline_b': (pipeline(mod_b.run, data_path='borrowers'), None),
+        'pipeline_c': (pipeline(mod_c.run, loans_path='loans', rates_path='rates'), None),
+    }
+
+def measure(fn: Callable, arg, n: int, repeat: int) -> Dict[str, float]:
+    fn(arg)  # warm-up: imports, caches, DuckDB cursor
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        t = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - t)
+    gc.collect()
+    tracemalloc.start()
+    fn(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    p50 = float(np.percentile(samples, 50))
+    return {
+        'rows': n,
+        'throughput': round(n / p50, 1),
+        'p50_ms': round(p50 * 1000, 3),
+        'p99_ms': round(float(np.percentile(samples, 99)) * 1000, 3),
+        'peak_mb': round(peak / 2**20, 2),
+    }
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> Tuple[List[str], List[str]]:
+    """(regressions, keys with no baseline entry)."""
+    failures, missing = [], []
+    for key, r in results.items():
+        b = baseline.get(key)
+        if not b:
+            missing.append(key)
+        elif r['throughput'] < b['throughput'] * (1 - tolerance):
+            failures.append(f"{key}: {r['throughput']:.0f} rows/s vs baseline {b['throughput']:.0f} (-{tolerance:.0%} allowed)")
+    return failures, missing
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog='python -m benchmarks')
+    ap.add_argument('--scale', type=float, default=1e4, help='rows per dataset (1e3 .. 1e7)')
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--repeat', type=int, default=5)
+    ap.add_argument('--scalar-cap', type=float, default=1e5, help='max rows for the scalar per-model cases')
+    ap.add_argument('--only', nargs='*', help='case names to run')
+    ap.add_argument('--baseline', default=BASELINE_PATH)
+    ap.add_argument('--save-baseline', action='store_true')
+    ap.add_argument('--check', action='store_true',
+                    help='exit 1 if any case regresses beyond --tolerance or has no baseline entry')
+    ap.add_argument('--tolerance', type=float, default=0.25)
+    ap.add_argument('--json', dest='json_out', help='also write results to this file')
+    args = ap.parse_args(argv)
+
+    n = int(args.scale)
+    with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+        data = Inputs(n, args.seed, workdir, int(args.scalar_cap))
+        selected = {k: v for k, v in cases(data).items() if not args.only or k in args.only}
+        uses = Counter(key for _, key in selected.values())
+        results = {}
+        for name, (fn, key) in selected.items():
+            arg = data.get(key)
+            rows = len(arg) if arg is not None else n
+            results[f'{name}@{rows}'] = r = measure(fn, arg, rows, args.repeat)
+            print(f"{name + '@' + str(rows):<32} {r['throughput']:>14,.0f} rows/s  p50 {r['p50_ms']:>10.2f} ms  "
+                  f"p99 {r['p99_ms']:>10.2f} ms  peak {r['peak_mb']:>8.1f} MB")
+            del arg
+            uses[key] -= 1
+            if not uses[key]:
+                data.release(key)
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f'baseline updated: {args.baseline}')
+        return 0
+    failures, missing = compare(results, baseline, args.tolerance)
+    for line in failures:
+        print('REGRESSION', line)
+    if missing:
+        # a gate with nothing to compare against must not pass silently
+        where = args.baseline if os.path.exists(args.baseline) else f'{args.baseline} (missing)'
+        print(f"{'ERROR' if args.check else 'WARNING'}: no baseline in {where} for: {', '.join(missing)}; "
+              f"record one with --save-baseline", file=sys.stderr)
+    return 1 if args.check and (failures or missing) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import csv, json, os
+from typing import Dict, Iterator
+import numpy as np
+
+BLOCK = 100_000
+
+KNOWN_MERCHANTS = ['WHOLEFOODS', 'WALMART', 'SHELL', 'UBER', 'NETFLIX', 'RENT *', 'LYFT', 'EXXON', 'SPOTIFY', 'HULU']
+QUOTED_RATES = [0.055, 0.0575, 0.06, 0.0625, 0.065, 0.0675, 0.07]
+TERMS = [120, 180, 240, 300, 360]
+
+def _blocks(n: int) -> Iterator[tuple]:
+    for start in range(0, n, BLOCK):
+        yield start, min(BLOCK, n - start)
+
+def transaction_rows(n: int, seed: int = 0, accounts: int = 1000, merchants: int = 5000) -> Iterator[Dict]:
+    """Statement lines: a few well-known merchants dominate, with a long tail of local ones."""
+    rng = np.random.default_rng(seed)
+    names = KNOWN_MERCHANTS + [f'STORE {i} MARKET' if i % 7 == 0 else f'SHOP {i}' for i in range(merchants)]
+    weights = np.concatenate([np.full(len(KNOWN_MERCHANTS), 20.0), 1.0 / np.arange(1, merchants + 1)])
+    weights /= weights.sum()
+    days = np.datetime64('2025-01-01')
+    for start, size in _blocks(n):
+        m = rng.choice(len(names), size=size, p=weights)
+        no_merchant = rng.random(size) < 0.1
+        amount = np.round(rng.lognormal(3.5, 1.0, size), 2)
+        debit = rng.random(size) < 0.9
+        acct = rng.integers(0, accounts, size)
+        day = rng.integers(0, 365, size)
+        for i in range(size):
+            name = names[m[i]]
+            yield {
+                'id': f't{start + i}',
+                'date': str(days + int(day[i])),
+                'description': f'{name.title()} purchase',
+                'merchant': None if no_merchant[i] else name,
+                'amount': float(amount[i]),
+                'type': 'debit' if debit[i] else 'credit',
+                'account_id': f'acc{acct[i]}',
+                'category': None,
+            }
+
+def borrower_rows(n: int, seed: int = 0) -> Iterator[Dict]:
+    rng = np.random.default_rng(seed)
+    for start, size in _blocks(n):
+        income = np.round(rng.uniform(3_000, 30_000, size), 2)
+        debts = np.round(income * rng.uniform(0, 0.3, size), 2)
+        fico = np.clip(rng.normal(700, 60, size), 300, 850).astype(int)
+        price = np.round(rng.uniform(150_000, 1_500_000, size), -3)
+        down = np.round(price * rng.uniform(0.03, 0.3, size), -2)
+        rate = rng.choice(QUOTED_RATES, size)
+        for i in range(size):
+            yield {
+                'borrower_id': f'b{start + i}', 'income_monthly': float(income[i]), 'debts_monthly': float(debts[i]),
+                'fico': int(fico[i]), 'home_price': float(price[i]), 'down_payment': float(down[i]),
+                'interest_rate': float(rate[i]),
+            }
+
+def loan_rows(n: int, seed: int = 0) -> Iterator[Dict]:
+    rng = np.random.default_rng(seed)
+    for start, size in _blocks(n):
+        balance = np.round(rng.uniform(50_000, 1_000_000, size), 2)
+        rate = np.round(rng.uniform(0.03, 0.08, size) / 0.00125) * 0.00125
+        term = rng.integers(60, 361, size)
+        for i in range(size):
+            yield {
+                'borrower_id': f'b{start + i}', 'loan_balance': float(balance[i]),
+                'current_rate': round(float(rate[i]), 5), 'remaining_term_months': int(term[i]),
+            }
+
+def rate_rows(days: int = 30, seed: int = 0) -> Iterator[Dict]:
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2025-07-01')
+    for d in range(days):
+        for term in TERMS:
+            base = 0.045 + term / 360 * 0.015
+            yield {'date': str(start + d), 'term_months': term, 'rate': round(float(base + rng.normal(0, 0.002)), 5)}
+
+def write_jsonl(path: str, rows: Iterator[Dict]):
+    with open(path, 'w', encoding='utf-8') as f:
+        for r in rows:
+            f.write(json.dumps(r) + '\n')
+
+def write_transactions_csv(path: str, rows: Iterator[Dict]):
+    fields = ['id', 'date', 'description', 'merchant', 'amount', 'type', 'account_id', 'category']
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        for r in rows:
+            w.writerow({k: '' if r[k] is None else r[k] for k in fields})
+
+def write_dataset(directory: str, n: int, seed: int = 0) -> Dict[str, str]:
+    """Write all four inputs at scale n; returns their paths keyed by dataset name."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        'transactions': os.path.join(directory, 'transactions.csv'),
+        'borrowers': os.path.join(directory, 'borrowers.jsonl'),
+        'loans': os.path.join(directory, 'loans.jsonl'),
+        'rates': os.path.join(directory, 'rates.jsonl'),
+    }
+    write_transactions_csv(paths['transactions'], transaction_rows(n, seed))
+    write_jsonl(paths['borrowers'], borrower_rows(n, seed))
+    write_jsonl(paths['loans'], loan_rows(n, seed))
+    write_jsonl(paths['rates'], rate_rows(seed=seed))
+    return paths
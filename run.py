@@ -1,17 +1,105 @@
-import sys, os
-from usecases.transaction_classifier_budget.module import run as run_a
-from usecases.mortgage_prequal_advisor.module import run as run_b
-from usecases.mortgage_rate_monitoring.module import run as run_c
+import argparse, importlib, json, os, sys
+from functools import partial
+from agent_platform.output import FORMATS, ECHO_MODES
+from agent_platform.orchestration import BACKENDS, PROFILERS, ParallelExecutor, enable_tracing, disable_tracing
+
+BASE_OUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'outputs')
+SHARD_DIR = os.path.join(BASE_OUT, '.shards')
+RESULT_CACHE_DIR = os.path.join(BASE_OUT, '.result_cache')
+
+# use case -> (module, input path attributes, part file extension) for sharded runs
+SHARDED = {
+    'a': ('usecases.transaction_classifier_budget.module', ('DATA_PATH',), '.json'),
+    'b': ('usecases.mortgage_prequal_advisor.module', ('DATA_PATH',), '.ndjson'),
+    'c': ('usecases.mortgage_rate_monitoring.module', ('LOANS_PATH', 'RATES_PATH'), '.ndjson'),
+}
+
+def _entry(module: str, attr: str = 'run'):
+    # use-case modules (and their heavy deps) are only imported when selected
+    return getattr(importlib.import_module(module), attr)
+
+def run_usecase(name: str, executor: ParallelExecutor = None, insight_store: str = None,
+                output_format: str = 'json', echo: str = 'full', refi_state: str = None, result_cache: str = None):
+    out = {'output_format': output_format, 'echo': echo}
+    if name == 'a':
+        _entry('usecases.transaction_classifier_budget.module')(
+            output_dir=os.path.join(BASE_OUT,'a'), executor=executor, store_path=insight_store,
+            cache_spec=result_cache, **out)
+    elif name == 'b':
+        _entry('usecases.mortgage_prequal_advisor.module')(
+            output_dir=os.path.join(BASE_OUT,'b'), executor=executor, cache_spec=result_cache, **out)
+    elif name == 'c':
+        _entry('usecases.mortgage_rate_monitoring.module')(
+            output_dir=os.path.join(BASE_OUT,'c'), executor=executor, state_path=refi_state, **out)
+    elif name == 'c-sweep':
+        _entry('usecases.mortgage_rate_monitoring.module', 'sweep')(output_dir=os.path.join(BASE_OUT,'c'))
+
+def run_sharded_usecase(name: str, shards: int, executor: ParallelExecutor = None, workers: int = 1,
+                        shard_dir: str = SHARD_DIR, role: str = 'all', output_format: str = 'json', echo: str = 'full'):
+    # partitioned, resumable run: shards are claimed by `workers` processes and merged into outputs/<name>
+    from agent_platform.sharding import run_sharded
+    module, inputs, ext = SHARDED[name]
+    mod = importlib.import_module(module)
+    merge = partial(mod.merge_shards, output_dir=os.path.join(BASE_OUT, name), output_format=output_format, echo=echo)
+    run_sharded(name, [getattr(mod, attr) for attr in inputs], mod.run_shard, merge, shards, shard_dir,
+                ext=ext, executor=executor, workers=workers, role=role)
 
 def main():
-    target = sys.argv[1] if len(sys.argv) > 1 else 'all'
-    base_out = os.path.join(os.path.dirname(__file__), 'outputs')
-    if target in ('a','all'):
-        run_a(output_dir=os.path.join(base_out,'a'))
-    if target in ('b','all'):
-        run_b(output_dir=os.path.join(base_out,'b'))
-    if target in ('c','all'):
-        run_c(output_dir=os.path.join(base_out,'c'))
+    parser = argparse.ArgumentParser()
+    parser.add_argument('target', nargs='?', default='all', choices=['a', 'b', 'c', 'c-sweep', 'all'])
+    parser.add_argument('--executor', default='serial', choices=BACKENDS,
+                        help="backend for fanning out records/chunks (and use cases with 'all')")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--insight-store', default=None,
+                        help='SQLite file with persisted per-account aggregates for use case a')
+    parser.add_argument('--refi-state', default=None,
+                        help='SQLite file with persisted refi state for use case c; only changes are written')
+    parser.add_argument('--format', dest='output_format', default='json', choices=FORMATS,
+                        help='outputs/ file format; parquet and arrow need pyarrow')
+    parser.add_argument('--echo', default='full', choices=ECHO_MODES,
+                        help='print every record to stdout, a one-line summary per file, or nothing')
+    parser.add_argument('--result-cache', nargs='?', const=RESULT_CACHE_DIR, default=None, metavar='DIR',
+                        help="reuse graph results for payloads seen before (a, b); DIR or 'memory'")
+    parser.add_argument('--shards', type=int, default=0,
+                        help='split a/b/c into N hash shards worked by --workers processes and merged; re-run to resume')
+    parser.add_argument('--shard-dir', default=SHARD_DIR, help='shard queue and per-shard outputs')
+    parser.add_argument('--shard-role', default='all', choices=['all', 'worker', 'merge'],
+                        help="'worker' only works shards (extra processes/hosts), 'merge' only merges a finished run")
+    parser.add_argument('--trace', nargs='?', const='', default=None, metavar='PATH',
+                        help='time every node and tool call; print a summary and write spans to PATH as JSONL')
+    parser.add_argument('--trace-memory', action='store_true', help='also record allocated memory per span (slow)')
+    parser.add_argument('--profile', choices=PROFILERS, default=None)
+    parser.add_argument('--profile-out', default=None, help='profiler output file (default: stderr)')
+    args = parser.parse_args()
+
+    traced = args.trace is not None or args.trace_memory or args.profile
+    if traced:
+        enable_tracing(args.trace or None, args.trace_memory, args.profile, args.profile_out)
+    executor = ParallelExecutor(args.executor, max_workers=args.workers)
+    if args.shards:
+        if args.target == 'c-sweep':
+            parser.error('c-sweep cannot be sharded')
+        workers = executor.max_workers if args.executor != 'serial' else 1
+        for name in (['a', 'b', 'c'] if args.target == 'all' else [args.target]):
+            run_sharded_usecase(name, args.shards, executor, workers, args.shard_dir,
+                                args.shard_role, args.output_format, args.echo)
+    elif args.target == 'all':
+        # use cases run concurrently on the chosen backend; each one runs its own records serially
+        list(executor.map(partial(run_usecase, insight_store=args.insight_store,
+                                  output_format=args.output_format, echo=args.echo, refi_state=args.refi_state,
+                                  result_cache=args.result_cache),
+                          ['a', 'b', 'c']))
+    else:
+        run_usecase(args.target, executor, args.insight_store, args.output_format, args.echo, args.refi_state,
+                    args.result_cache)
+    if args.result_cache:
+        # hit rates of this process's caches (process workers keep their own in-memory tier)
+        from agent_platform.cache import result_cache_stats
+        for stats in result_cache_stats():
+            print(json.dumps(stats), file=sys.stderr)
+    if traced:
+        tracer = disable_tracing()
+        print(tracer.format_summary(), file=sys.stderr)
 
 if __name__ == '__main__':
     main()
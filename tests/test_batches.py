@@ -0,0 +1,60 @@
+import math
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from agent_platform.batches import LoanBatch, StrColumn, TransactionBatch
+from agent_platform.schemas import LoanInfo, Transaction
+
+LOAN = {'borrower_id': 'b1', 'loan_balance': 1000.0, 'current_rate': 0.05, 'remaining_term_months': 360}
+TX = {'id': 't1', 'date': '2025-07-01', 'description': 'x', 'amount': 1.0, 'type': 'debit', 'account_id': 'a'}
+
+EDGES = [
+    ('loan_balance', '12.5'), ('loan_balance', ' 12 '), ('loan_balance', 'abc'), ('loan_balance', True),
+    ('loan_balance', float('nan')), ('loan_balance', float('inf')), ('loan_balance', [1]), ('loan_balance', None),
+    ('remaining_term_months', '360'), ('remaining_term_months', '360.5'), ('remaining_term_months', 360.0),
+    ('remaining_term_months', 360.5), ('remaining_term_months', True), ('remaining_term_months', float('nan')),
+    ('remaining_term_months', float('inf')), ('borrower_id', 5), ('borrower_id', None),
+]
+
+def _model(model, row, field):
+    try:
+        return getattr(model(**row), field)
+    except ValidationError:
+        return 'invalid'
+
+def _batch(batch_cls, base, row, field):
+    try:
+        return batch_cls.from_rows([base, row]).columns[field].tolist()[1]
+    except ValueError:
+        return 'invalid'
+
+def _same(a, b):
+    return a == b or (isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b))
+
+@pytest.mark.parametrize('field,value', EDGES)
+def test_from_rows_accepts_and_coerces_like_the_model(field, value):
+    row = {**LOAN, field: value}
+    assert _same(_batch(LoanBatch, LOAN, row, field), _model(LoanInfo, row, field))
+
+@pytest.mark.parametrize('field,value', [('merchant', None), ('merchant', 3), ('category', None), ('amount', '2.50'),
+                                         ('amount', False), ('description', None), ('type', b'debit')])
+def test_transaction_fields_follow_the_model(field, value):
+    row = {**TX, field: value}
+    assert _same(_batch(TransactionBatch, TX, row, field), _model(Transaction, row, field))
+
+def test_missing_required_field():
+    row = dict(LOAN)
+    del row['loan_balance']
+    with pytest.raises(ValueError, match='loan_balance is required'):
+        LoanBatch.from_rows([row])
+
+def test_str_column_indexing_matches_an_object_array():
+    values = ['a', '', 'héllo', 'xyz', '', 'end']
+    encoded = [v.encode('utf-8') for v in values]
+    offsets = np.concatenate([[0], np.cumsum([len(e) for e in encoded])]).astype('<i8')
+    col = StrColumn(offsets, np.frombuffer(b''.join(encoded), dtype='u1'))
+    ref = np.array(values, dtype=object)
+    for key in ([4, 0, 2], [], [3, 3], np.array([True, False, True, False, True, False]), slice(1, 5, 2)):
+        assert col[key].tolist() == ref[key].tolist()
+    assert col[2] == 'héllo' and col[-1] == 'end'
+    assert col[1:4].tolist() == values[1:4] and col[2:4][1:].tolist() == ['xyz']
@@ -0,0 +1,97 @@
+import asyncio, random
+import pytest
+from agent_platform.batching import GraphFrontend, MicroBatcher
+from agent_platform.cache import RESULT_CACHE_ENV
+from agent_platform.orchestration import LocalGraph
+from agent_platform.schemas import BorrowerProfile
+from usecases.mortgage_rate_monitoring import api as prequal_api
+
+@pytest.fixture(autouse=True)
+def _no_result_cache(monkeypatch):
+    monkeypatch.delenv(RESULT_CACHE_ENV, raising=False)
+
+def _profiles(n: int):
+    rng = random.Random(8)
+    return [
+        BorrowerProfile(borrower_id=f'b{i}', income_monthly=rng.randint(3000, 20000), debts_monthly=rng.randint(0, 4000),
+                        fico=rng.randint(550, 820), home_price=rng.randint(150000, 900000),
+                        down_payment=rng.randint(5000, 200000), interest_rate=rng.choice((0.0, 0.05, 0.065)))
+        for i in range(n)
+    ]
+
+def _echo(states):
+    return [{**s, 'seen': True} for s in states]
+
+@pytest.mark.parametrize('offload', [False, True])
+def test_frontend_matches_local_graph(offload):
+    states = [{'profile': p} for p in _profiles(110)]
+    local = LocalGraph(prequal_api.NODES)
+
+    async def main():
+        frontend = GraphFrontend({'prequal': prequal_api.batch_invoke}, max_batch=32, window_ms=1.0, offload=offload)
+        try:
+            return await asyncio.gather(*(frontend.ainvoke('prequal', s) for s in states)), frontend.stats()
+        finally:
+            await frontend.aclose()
+
+    results, stats = asyncio.run(main())
+    assert results == [local.invoke(s) for s in states]
+    assert stats['prequal']['requests'] == 110 and stats['prequal']['max_batch_size'] <= 32
+    assert stats['prequal']['batches'] < 110
+
+def test_batches_are_cut_at_max_batch():
+    async def main():
+        b = MicroBatcher(_echo, max_batch=4, window_ms=50.0)
+        out = await asyncio.gather(*(b.submit({'i': i}) for i in range(10)))
+        return out, b.stats
+    out, stats = asyncio.run(main())
+    assert [r['i'] for r in out] == list(range(10))
+    assert list(stats.sizes) == [4, 4, 2]
+
+@pytest.mark.parametrize('offload', [False, True])
+def test_handler_error_reaches_every_caller_in_the_batch(offload):
+    def broken(states):
+        raise ValueError('boom')
+
+    async def main():
+        b = MicroBatcher(broken, max_batch=8, window_ms=1.0, offload=offload)
+        out = await asyncio.gather(*(b.submit({'i': i}) for i in range(5)), return_exceptions=True)
+        await b.aclose()
+        return out, b.stats
+    out, stats = asyncio.run(main())
+    assert all(isinstance(e, ValueError) and str(e) == 'boom' for e in out)
+    assert stats.errors == 1 and stats.requests == 5
+
+def test_wrong_result_count_fails_the_batch():
+    async def main():
+        b = MicroBatcher(lambda states: states[:-1], max_batch=8, window_ms=1.0)
+        return await asyncio.gather(*(b.submit({'i': i}) for i in range(3)), return_exceptions=True)
+    assert all(isinstance(e, RuntimeError) for e in asyncio.run(main()))
+
+@pytest.mark.parametrize('fail', [False, True])
+def test_cancelled_caller_does_not_break_the_batch(fail):
+    def handler(states):
+        if fail:
+            raise ValueError('boom')
+        return _echo(states)
+
+    async def main():
+        b = MicroBatcher(handler, max_batch=8, window_ms=20.0)
+        tasks = [asyncio.ensure_future(b.submit({'i': i})) for i in range(3)]
+        await asyncio.sleep(0)  # all three are queued, the window is still open
+        tasks[1].cancel()
+        out = await asyncio.gather(*tasks, return_exceptions=True)
+        return out, b
+    out, b = asyncio.run(main())
+    assert isinstance(out[1], asyncio.CancelledError)
+    if fail:
+        assert isinstance(out[0], ValueError) and isinstance(out[2], ValueError)
+    else:
+        assert [out[0]['i'], out[2]['i']] == [0, 2]
+    assert b._in_flight == 0 and not b._pending
+
+def test_unknown_graph():
+    async def main():
+        await GraphFrontend({'prequal': _echo}).ainvoke('nope', {})
+    with pytest.raises(KeyError):
+        asyncio.run(main())
@@ -0,0 +1,66 @@
+import random
+from collections import defaultdict
+from agent_platform.batches import TransactionBatch
+from agent_platform.schemas import Transaction
+from agent_platform.tools import budget_groups, budget_insights, insights_from_groups, merge_groups
+
+MERCHANTS = ('WHOLEFOODS', 'UBER', 'NETFLIX', 'SHELL', 'AMAZON', 'STARBUCKS', 'TARGET')
+
+def _reference(transactions) -> dict:
+    # the aggregation budget_insights used to do row by row (Unknown category, debit-only spend,
+    # merchant falling back to the description)
+    cats, merchants = defaultdict(lambda: [0.0, 0]), defaultdict(lambda: [0.0, 0])
+    for t in transactions:
+        spend = t.amount if t.type == 'debit' else 0.0
+        for acc, key in ((cats, t.category if t.category is not None else 'Unknown'),
+                         (merchants, t.merchant if t.merchant is not None else t.description)):
+            acc[key][0] += spend
+            acc[key][1] += 1
+    by_spend = sorted(((m, round(s, 2), n) for m, (s, n) in merchants.items()), key=lambda r: r[1], reverse=True)
+    return {
+        'by_category': sorted(({'category': c, 'total_spend': round(s, 2), 'n': n} for c, (s, n) in cats.items()),
+                              key=lambda r: r['total_spend'], reverse=True),
+        'top_merchants': [{'merchant': m, 'total_spend': s} for m, s, _ in by_spend[:5]],
+        'possible_recurring': sorted(({'merchant': m, 'hits': n} for m, _, n in by_spend if n >= 2),
+                                     key=lambda r: r['hits'], reverse=True),
+    }
+
+def _canon(ins: dict) -> dict:
+    # recurring merchants tie on hits; their order is not part of the contract
+    return {**ins, 'possible_recurring': sorted((r['merchant'], r['hits']) for r in ins['possible_recurring'])}
+
+def _transactions(n: int, seed: int = 4, categories=('Groceries', 'Transport', 'Entertainment', None)):
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        merchant = rng.choice(MERCHANTS)
+        out.append(Transaction(
+            id=f't{i}', date='2025-07-01', description=f'{merchant} #{rng.randint(1, 3)}',
+            merchant=rng.choice((merchant, merchant, None)), amount=rng.randint(100, 50_000) / 100 + i * 1e-4,
+            type=rng.choice(('debit', 'debit', 'credit')), account_id='acc1', category=rng.choice(categories),
+        ))
+    return out
+
+def test_grouping_sets_match_row_aggregation():
+    txs = _transactions(500)
+    assert _canon(budget_insights(txs)) == _canon(_reference(txs))
+    assert _canon(budget_insights(TransactionBatch.from_models(txs))) == _canon(_reference(txs))
+
+def test_merged_chunks_match_whole_input():
+    txs = _transactions(500)
+    one_category = _transactions(40, seed=9, categories=('Rent',))
+    chunks = [txs[:120], [], txs[120:121], one_category, txs[121:]]
+    merged = merge_groups(*(budget_groups(c) for c in chunks))
+    assert _canon(insights_from_groups(merged)) == _canon(_reference(txs + one_category))
+    # merging is order-independent and an empty chunk adds nothing
+    reordered = merge_groups(*(budget_groups(c) for c in reversed(chunks)))
+    assert _canon(insights_from_groups(reordered)) == _canon(insights_from_groups(merged))
+
+def test_empty_and_single_category_inputs():
+    assert budget_groups([]) == []
+    assert insights_from_groups(merge_groups([], [])) == {'by_category': [], 'top_merchants': [], 'possible_recurring': []}
+    rent = _transactions(30, seed=2, categories=('Rent',))
+    ins = budget_insights(rent)
+    assert [r['category'] for r in ins['by_category']] == ['Rent']
+    assert ins['by_category'][0]['n'] == 30
+    assert _canon(ins) == _canon(_reference(rent))
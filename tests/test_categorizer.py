@@ -0,0 +1,56 @@
+import itertools, random, re
+from agent_platform.schemas import Transaction
+from agent_platform.tools import KEYWORD_RULES, MERCHANT_MAP, Categorizer, categorize
+
+def _ordered(key: str, merchant_map: dict, keyword_rules: list) -> str:
+    # the per-rule chain Categorizer replaces: merchant map in order, then keyword rules in order
+    for pat, cat in merchant_map.items():
+        if pat.endswith('*') and key.startswith(pat[:-1]):
+            return cat
+        if pat in key:
+            return cat
+    for rx, cat in keyword_rules:
+        if re.search(rx, key):
+            return cat
+    return 'Other'
+
+TOKENS = ['WHOLEFOODS', 'WALMART', 'SHELL', 'UBER', 'NETFLIX', 'RENT', 'RENT *', 'GROCERY', 'GROC', 'MARKET',
+          'SUPERMARKET', 'FUEL', 'GAS', 'EXXON', 'LYFT', 'TAXI', 'SPOTIFY', 'HULU', 'PARENT', 'CURRENT', 'ACME', '#123']
+
+def test_overlapping_keywords_follow_rule_order():
+    c = Categorizer(MERCHANT_MAP, KEYWORD_RULES)
+    cases = {
+        'UBER SHELL': 'Gas',             # both merchants: SHELL comes first in the map
+        'SUPERMARKET SHELL': 'Gas',      # merchant map beats keyword rules
+        'TAXI MARKET': 'Groceries',      # keyword rules in order, not by position
+        'HULU GAS': 'Gas',
+        'RENT PAYMENT': 'Rent',          # 'RENT *' prefix
+        'PARENT UBER': 'Transport',
+        'CURRENT': 'Rent',               # RENT keyword inside a word
+        'ACME #123': 'Other',
+        '': 'Other',
+    }
+    for key, cat in cases.items():
+        assert c.categorize_key(key) == cat == _ordered(key, MERCHANT_MAP, KEYWORD_RULES), key
+
+def test_matches_ordered_rules_on_random_keys():
+    c = Categorizer(MERCHANT_MAP, KEYWORD_RULES)
+    rng = random.Random(1)
+    for _ in range(3000):
+        key = ' '.join(rng.sample(TOKENS, rng.randint(1, 4)))
+        assert c.categorize_key(key) == _ordered(key, MERCHANT_MAP, KEYWORD_RULES), key
+
+def test_earlier_rule_wins_over_earlier_position():
+    # a later, shorter rule matches at every position the earlier one does and more
+    merchant_map = {'AB': 'first', 'B*': 'prefix'}
+    rules = [(r'C|A', 'third'), (r'A', 'fourth')]
+    c = Categorizer(merchant_map, rules)
+    for chars in itertools.product('ABC ', repeat=4):
+        key = ''.join(chars)
+        assert c.categorize_key(key) == _ordered(key, merchant_map, rules), key
+
+def test_merchant_then_description_fallback():
+    tx = dict(id='t1', date='2025-07-01', amount=10.0, type='debit', account_id='a1')
+    assert categorize(Transaction(description='UBER TRIP', merchant='SHELL', **tx)) == 'Gas'
+    assert categorize(Transaction(description='UBER TRIP', **tx)) == 'Transport'
+    assert categorize(Transaction(description='misc', **tx)) == 'Other'
@@ -0,0 +1,109 @@
+import json, os
+import pytest
+from agent_platform import colcache
+from agent_platform.batches import LoanBatch, TransactionBatch
+from agent_platform.tools import _parse_loans, _parse_transactions
+
+@pytest.fixture(autouse=True)
+def _cache_next_to_source(monkeypatch):
+    monkeypatch.delenv(colcache.CACHE_ENV, raising=False)
+
+class CountingParse:
+    def __init__(self, parse):
+        self.parse = parse
+        self.calls = 0
+
+    def __call__(self, path, chunk_size):
+        self.calls += 1
+        return self.parse(path, chunk_size)
+
+def _loans(path, n, rate=0.05):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n):
+            f.write(json.dumps({'borrower_id': f'b{i}', 'loan_balance': 1000.0 * (i + 1), 'current_rate': rate,
+                                'remaining_term_months': 360}) + '\n')
+
+def _entry(path):
+    return colcache._entry_dir(colcache.cache_root(path), LoanBatch, path)
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+def test_touched_but_unchanged_source_reuses_the_columns(tmp_path):
+    path = str(tmp_path / 'loans.jsonl')
+    _loans(path, 10)
+    parse = CountingParse(_parse_loans)
+    first = colcache.cached_batch(LoanBatch, path, parse, 4)
+    manifest = colcache._read_manifest(_entry(path))
+    _bump_mtime(path)
+    again = colcache.cached_batch(LoanBatch, path, parse, 4)
+    assert parse.calls == 1
+    refreshed = colcache._read_manifest(_entry(path))
+    assert refreshed['data'] == manifest['data'] and refreshed['stamp'] != manifest['stamp']
+    assert again.to_models() == first.to_models()
+
+def test_changed_source_is_reparsed_and_replaces_the_entry(tmp_path):
+    path = str(tmp_path / 'loans.jsonl')
+    _loans(path, 10)
+    parse = CountingParse(_parse_loans)
+    colcache.cached_batch(LoanBatch, path, parse, 4)
+    old = colcache._read_manifest(_entry(path))['data']
+    _loans(path, 10, rate=0.07)
+    _bump_mtime(path)
+    batch = colcache.cached_batch(LoanBatch, path, parse, 4)
+    assert parse.calls == 2
+    assert batch.current_rate.tolist() == [0.07] * 10
+    new = colcache._read_manifest(_entry(path))['data']
+    assert new != old and sorted(os.listdir(_entry(path))) == sorted([new, 'manifest.json'])
+
+def test_consumer_that_stops_early_leaves_no_entry(tmp_path):
+    path = str(tmp_path / 'loans.jsonl')
+    _loans(path, 10)
+    parse = CountingParse(_parse_loans)
+    chunks = colcache.cached_batches(LoanBatch, path, parse, 4)
+    assert len(next(chunks)) == 4
+    chunks.close()
+    entry = _entry(path)
+    assert colcache._read_manifest(entry) is None
+    assert not os.path.exists(entry) or os.listdir(entry) == []
+    # a full pass commits, and the next one is served from the cache
+    assert [len(c) for c in colcache.cached_batches(LoanBatch, path, parse, 4)] == [4, 4, 2]
+    assert [len(c) for c in colcache.cached_batches(LoanBatch, path, parse, 4)] == [4, 4, 2]
+    assert parse.calls == 2
+
+def test_streamed_and_cached_chunks_match(tmp_path):
+    path = str(tmp_path / 'tx.csv')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('id,date,description,merchant,amount,type,account_id,category\n')
+        for i in range(25):
+            f.write(f't{i},2025-07-{i % 28 + 1:02d},café {"x" * i},{"UBER" if i % 3 else ""},{i}.5,debit,a{i % 4},\n')
+    cold = [c.to_models() for c in colcache.cached_batches(TransactionBatch, path, _parse_transactions, 10)]
+    warm = [c.to_models() for c in colcache.cached_batches(TransactionBatch, path, _parse_transactions, 10)]
+    parsed = [c.to_models() for c in _parse_transactions(path, 10)]
+    assert cold == warm == parsed
+
+def test_empty_source_maps_to_an_empty_batch(tmp_path):
+    path = str(tmp_path / 'loans.jsonl')
+    _loans(path, 0)
+    parse = CountingParse(_parse_loans)
+    assert len(colcache.cached_batch(LoanBatch, path, parse, 4)) == 0
+    batch = colcache.cached_batch(LoanBatch, path, parse, 4)
+    assert parse.calls == 1 and len(batch) == 0 and batch.borrower_id.tolist() == []
+
+def test_concurrent_commits_of_the_same_content(tmp_path):
+    path = str(tmp_path / 'loans.jsonl')
+    _loans(path, 6)
+    writers = []
+    for _ in range(2):
+        entry = colcache._Entry(LoanBatch, path)
+        assert entry.open() is None
+        writer = entry.start()
+        for chunk in _parse_loans(path, 4):
+            writer.append(chunk)
+        writers.append((entry, writer))
+    # the second rename finds the first one's directory in place and drops its own copy
+    dirs = [entry.commit(writer) for entry, writer in writers]
+    assert dirs[0] == dirs[1]
+    assert sorted(os.listdir(_entry(path))) == sorted([os.path.basename(dirs[0]), 'manifest.json'])
+    assert colcache._Entry(LoanBatch, path).open().borrower_id.tolist() == [f'b{i}' for i in range(6)]
@@ -0,0 +1,59 @@
+import random
+from agent_platform.aggregates import InsightStore
+from agent_platform.batches import TransactionBatch
+from agent_platform.schemas import Transaction
+from agent_platform.tools import budget_insights
+
+MERCHANTS = ('WHOLEFOODS', 'UBER', 'NETFLIX', 'SHELL', 'AMAZON', 'STARBUCKS', 'TARGET', 'COSTCO')
+CATEGORIES = ('Groceries', 'Transport', 'Entertainment', 'Shopping', None)
+
+def _tx(i: int, rng: random.Random) -> Transaction:
+    merchant = rng.choice(MERCHANTS)
+    return Transaction(
+        id=f't{i}', date=f'2025-07-{rng.randint(1, 28):02d}', description=f'{merchant} x',
+        merchant=rng.choice((merchant, None)), amount=rng.randint(100, 20_000) / 100,
+        type=rng.choice(('debit', 'debit', 'credit')), account_id=f'acc{rng.randint(1, 6)}',
+        category=rng.choice(CATEGORIES),
+    )
+
+def _edit(t: Transaction, rng: random.Random) -> Transaction:
+    field = rng.choice(('amount', 'category', 'merchant', 'type', 'account_id'))
+    value = {
+        'amount': rng.randint(100, 20_000) / 100, 'category': rng.choice(CATEGORIES),
+        'merchant': rng.choice(MERCHANTS), 'type': rng.choice(('debit', 'credit')),
+        'account_id': f'acc{rng.randint(1, 6)}',
+    }[field]
+    return t.model_copy(update={field: value})
+
+def _canon(ins: dict) -> dict:
+    # ties are ordered differently by SQLite and DuckDB; compare contents
+    return {
+        'by_category': sorted((r['category'], r['total_spend'], r['n']) for r in ins['by_category']),
+        'top_merchants': sorted(r['total_spend'] for r in ins['top_merchants']),
+        'possible_recurring': sorted((r['merchant'], r['hits']) for r in ins['possible_recurring']),
+    }
+
+def test_replays_and_changed_ids_match_budget_insights(tmp_path):
+    rng = random.Random(3)
+    latest = {}
+    store = InsightStore(str(tmp_path / 'insights.sqlite'))
+    next_id = 0
+    try:
+        for step in range(12):
+            batch = [_tx(next_id + k, rng) for k in range(60)]
+            next_id += 60
+            if latest:
+                # replayed ids, some of them changed
+                old = rng.sample(sorted(latest.values(), key=lambda t: t.id), 40)
+                batch += [_edit(t, rng) if k % 2 else t for k, t in enumerate(old)]
+            rng.shuffle(batch)
+            store.apply(TransactionBatch.from_models(batch) if step % 2 else batch)
+            latest.update((t.id, t) for t in batch)
+            assert _canon(store.insights()) == _canon(budget_insights(list(latest.values()))), f'step {step}'
+            account = f'acc{rng.randint(1, 6)}'
+            expected = budget_insights([t for t in latest.values() if t.account_id == account])
+            assert _canon(store.insights(account)) == _canon(expected), f'step {step} {account}'
+        # re-applying the current history is a no-op
+        assert store.apply(list(latest.values())) == 0
+    finally:
+        store.close()
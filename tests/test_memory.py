@@ -0,0 +1,24 @@
+import os, pickle
+from agent_platform.memory import ConversationMemory, make_memory
+
+def _open_files():
+    return {os.path.realpath(f'/proc/self/fd/{fd}') for fd in os.listdir('/proc/self/fd')}
+
+def test_spilled_turns_leave_no_open_handle(tmp_path):
+    path = str(tmp_path / 'spill' / 'turns.jsonl')
+    m = make_memory(max_turns=2, spill_path=path)
+    for i in range(5):
+        m.add('system', 'turn {}', i)
+    assert [t.content for t in m.turns()] == ['turn 3', 'turn 4']
+    assert list(m.spilled()) == [{'role': 'system', 'content': f'turn {i}'} for i in range(3)]
+    if os.path.isdir('/proc/self/fd'):
+        assert path not in _open_files()
+
+def test_pickled_memory_keeps_spilling(tmp_path):
+    path = str(tmp_path / 'turns.jsonl')
+    m = ConversationMemory(max_turns=1, spill_path=path)
+    m.add('user', 'a')
+    m.add('user', 'b')
+    copy = pickle.loads(pickle.dumps(m))
+    copy.add('user', 'c')
+    assert [t['content'] for t in m.spilled()] == ['a', 'b']
@@ -0,0 +1,69 @@
+import json, os, threading
+import pytest
+from agent_platform.output import JSONWriter, NDJSONWriter, open_writer, write_json
+
+RECORDS = [{'id': i, 'name': f'r{i}', 'tags': ['a', 'b'][:i % 3], 'nested': {'x': i / 3}} for i in range(5)]
+
+def _files(directory):
+    return sorted(os.listdir(directory))
+
+def test_json_writer_matches_json_dump(tmp_path):
+    path = str(tmp_path / 'out.json')
+    with JSONWriter(path, 'records', head=lambda first: {'first': first and first['id'], 'n': [1, 2]}) as w:
+        w.write_many(RECORDS)
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == json.dumps({'first': 0, 'n': [1, 2], 'records': RECORDS}, indent=2)
+    with JSONWriter(path, 'records', head={'n': 0}) as w:
+        pass
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == json.dumps({'n': 0, 'records': []}, indent=2)
+
+def test_failed_finish_removes_the_temp_file(tmp_path):
+    class Broken(NDJSONWriter):
+        def _finish(self):
+            raise OSError('disk full')
+
+    path = str(tmp_path / 'out.ndjson')
+    with open(path, 'w') as f:
+        f.write('previous\n')
+    w = Broken(path)
+    w.write_many(RECORDS)
+    with pytest.raises(OSError):
+        w.close()
+    assert _files(tmp_path) == ['out.ndjson']
+    with open(path) as f:
+        assert f.read() == 'previous\n'
+    w.close()  # already aborted: a no-op
+
+def test_exception_in_block_keeps_previous_output(tmp_path):
+    path = str(tmp_path / 'out.ndjson')
+    with NDJSONWriter(path) as w:
+        w.write({'v': 1})
+    with pytest.raises(RuntimeError):
+        with NDJSONWriter(path) as w:
+            w.write({'v': 2})
+            raise RuntimeError
+    assert _files(tmp_path) == ['out.ndjson']
+    with open(path) as f:
+        assert [json.loads(l) for l in f] == [{'v': 1}]
+
+def test_full_echo_of_concurrent_writers_does_not_interleave(tmp_path, capsys):
+    def write(name):
+        with open_writer(str(tmp_path), name, 'json', 'full', key='records') as w:
+            for r in RECORDS * 40:
+                w.write({**r, 'doc': name})
+
+    threads = [threading.Thread(target=write, args=(f'doc{i}',)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    write_json(str(tmp_path / 'single.json'), {'one': 1}, 'full')
+    out, decoder, docs, i = capsys.readouterr().out, json.JSONDecoder(), [], 0
+    while i < len(out):
+        doc, i = decoder.raw_decode(out, i)
+        docs.append(doc)
+        i += 1  # newline after every document
+    assert len(docs) == 5 and docs[-1] == {'one': 1}
+    for doc in docs[:-1]:
+        assert len({r['doc'] for r in doc['records']}) == 1 and len(doc['records']) == len(RECORDS) * 40
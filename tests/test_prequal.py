@@ -0,0 +1,50 @@
+import random
+import numpy as np
+from agent_platform.schemas import BorrowerProfile
+from agent_platform.tools import PrequalContext, policy_flags, policy_flags_batch, prequal_batch, round_batch
+
+def _per_record(profiles):
+    out = []
+    for p in profiles:
+        ctx = PrequalContext(p)
+        out.append((ctx.piti, ctx.dti, ctx.ltv, ctx.max_loan, policy_flags(ctx.dti, ctx.ltv, p.fico)))
+    return out
+
+def _batched(profiles):
+    b = prequal_batch(profiles)
+    cols = [b[k].tolist() for k in ('piti', 'dti', 'ltv', 'max_loan')]
+    return [(*row, flags) for *row, flags in zip(*cols, policy_flags_batch(b))]
+
+def test_dti_on_a_half_tie_flags_the_same_in_both_paths():
+    # 1118.13 / 2600 is just above 0.43005: round() gives 0.4301, plain np.round gave 0.43
+    p = BorrowerProfile(borrower_id='b', income_monthly=2600, debts_monthly=1118.13, fico=700,
+                        home_price=300000, down_payment=300000, interest_rate=0.0, prop_tax_monthly=0, insurance_monthly=0)
+    assert _batched([p]) == _per_record([p])
+    assert _batched([p])[0][4] == ['DTI>43%']
+
+def test_piti_on_a_half_tie():
+    p = BorrowerProfile(borrower_id='b', income_monthly=9000, debts_monthly=0, fico=700, home_price=300000,
+                        down_payment=300000, interest_rate=0.0, insurance_monthly=1011.005)
+    assert _batched([p])[0][0] == _per_record([p])[0][0] == 1311.01
+
+def test_piti_on_a_half_tie_with_interest():
+    # numpy's vectorized pow is one bit off builtin pow at this rate, enough to cross the tie
+    p = BorrowerProfile(borrower_id='b', income_monthly=9000, debts_monthly=0, fico=700, home_price=645447,
+                        down_payment=0, interest_rate=0.05428, prop_tax_monthly=0, insurance_monthly=0.0019727119097296963)
+    assert _batched([p] * 3)[0][0] == _per_record([p])[0][0] == 3635.68
+
+def test_batched_matches_per_record_near_ties():
+    rng = random.Random(3)
+    profiles = [
+        BorrowerProfile(borrower_id=f'b{i}', income_monthly=income, debts_monthly=round(0.43005 * income, rng.choice((0, 1, 2))),
+                        fico=rng.randint(600, 800), home_price=price, down_payment=price - round(rng.choice((0.8, 0.97)) * price + 0.5),
+                        interest_rate=rng.choice((0.0, 0.05, 0.065, round(rng.uniform(0.02, 0.09), 5))), insurance_monthly=rng.randint(0, 500) + 0.005)
+        for i, (income, price) in enumerate((rng.randint(2000, 30000), rng.randint(100000, 900000)) for _ in range(2000))
+    ]
+    assert _batched(profiles) == _per_record(profiles)
+
+def test_round_batch_is_builtin_round():
+    rng = random.Random(4)
+    for nd in (2, 4):
+        xs = [rng.randint(0, 10 ** 7) / 10 ** nd + 0.5 / 10 ** nd for _ in range(5000)] + [rng.uniform(-1e4, 1e4) for _ in range(5000)]
+        assert round_batch(np.array(xs), nd).tolist() == [round(x, nd) for x in xs]
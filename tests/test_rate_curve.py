@@ -0,0 +1,53 @@
+import json, os
+import pytest
+from agent_platform.tools import RateCurve, rate_curve
+
+QUOTES = [
+    {'date': '2025-07-01', 'term_months': 180, 'rate': 0.0550},
+    {'date': '2025-07-01', 'term_months': 360, 'rate': 0.0650},
+    {'date': '2025-07-02', 'term_months': 180, 'rate': 0.0560},
+    {'date': '2025-07-02', 'term_months': 360, 'rate': 0.0620},
+    {'date': '2025-07-02', 'term_months': 240, 'rate': 0.0600},
+]
+
+def _write(path, quotes):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(q) + '\n' for q in quotes)
+
+def test_exact_and_interpolated_terms():
+    c = RateCurve.from_rates(QUOTES)
+    # best quote per term over the whole file
+    assert c.best_by_term() == {180: 0.0550, 240: 0.0600, 360: 0.0620}
+    assert c.rate(180) == 0.0550
+    assert c.rate(360) == 0.0620
+    assert c.rate(210) == pytest.approx(0.0575)   # halfway between 180 and 240
+    assert c.rate(300) == pytest.approx(0.0610)   # halfway between 240 and 360
+
+def test_terms_outside_the_quoted_range_are_held_flat():
+    c = RateCurve.from_rates(QUOTES)
+    assert c.rate(60) == c.rate(179) == c.rate(180) == 0.0550
+    assert c.rate(480) == c.rate(360) == 0.0620
+    assert c.rates_for([0, 180, 1000]).tolist() == [0.0550, 0.0550, 0.0620]
+
+def test_as_of_uses_quotes_up_to_the_date():
+    c = RateCurve.from_rates(QUOTES)
+    # only the first day: 240 is not quoted yet, so it interpolates 180..360
+    assert c.rate(240, as_of='2025-07-01') == pytest.approx(0.0550 + (0.0650 - 0.0550) * 60 / 180)
+    assert c.market_rate(180, as_of='2025-07-02') == 0.0560   # latest quote, not the best
+    assert c.market_rate() == c.min_rate() == 0.0550
+    with pytest.raises(ValueError):
+        c.rate(180, as_of='2025-06-30')
+
+def test_rate_curve_is_rebuilt_when_the_file_is_rewritten(tmp_path):
+    path = str(tmp_path / 'rates.jsonl')
+    _write(path, QUOTES)
+    first = rate_curve(path)
+    assert rate_curve(path) is first
+    # new contents; the mtime is moved on so coarse filesystem timestamps still differ
+    _write(path, [{**q, 'rate': round(q['rate'] + 0.0010, 4)} for q in QUOTES])
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    second = rate_curve(path)
+    assert second is not first
+    assert second.rate(180) == pytest.approx(0.0560)
+    assert rate_curve(path) is second
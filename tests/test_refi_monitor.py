@@ -0,0 +1,63 @@
+import random
+from agent_platform.batches import LoanBatch
+from agent_platform.monitoring import RefiMonitor
+from agent_platform.tools import RateCurve, calculate_savings_batch
+
+TERMS = (120, 180, 240, 300, 360)
+
+def _loan(i: int, rng: random.Random) -> dict:
+    return {
+        'borrower_id': f'b{i:04d}', 'loan_balance': float(rng.randint(50_000, 900_000)),
+        'current_rate': round(rng.uniform(0.03, 0.08), 4), 'remaining_term_months': rng.choice(TERMS),
+    }
+
+def _curve(rate: float) -> RateCurve:
+    return RateCurve(['2025-07-01'] * len(TERMS), list(TERMS), [rate + 0.001 * k for k in range(len(TERMS))])
+
+def _recompute(loans: dict, curve: RateCurve, threshold: float) -> dict:
+    rows = sorted(loans.values(), key=lambda r: r['borrower_id'])
+    savings = calculate_savings_batch([r['loan_balance'] for r in rows], [r['current_rate'] for r in rows],
+                                      [r['remaining_term_months'] for r in rows], curve.market_rate())
+    return {r['borrower_id']: 'Yes' if s >= threshold else 'No' for r, s in zip(rows, savings.tolist())}
+
+def test_stored_alerts_match_full_recompute(tmp_path):
+    rng = random.Random(7)
+    loans = {r['borrower_id']: r for r in (_loan(i, rng) for i in range(400))}
+    m = RefiMonitor(str(tmp_path / 'refi.sqlite'))
+    rate, threshold, next_id = 0.06, 150.0, 400
+    try:
+        for step in range(40):
+            action = step % 4
+            if action == 0:    # rate move, both directions
+                rate = round(min(0.085, max(0.025, rate + rng.uniform(-0.006, 0.006))), 4)
+            elif action == 1:  # edit some loans, add a few
+                for b in rng.sample(sorted(loans), 15):
+                    loans[b] = {**loans[b], 'loan_balance': float(rng.randint(50_000, 900_000)),
+                                'current_rate': round(rng.uniform(0.03, 0.08), 4)}
+                for _ in range(5):
+                    new = _loan(next_id, rng)
+                    loans[new['borrower_id']] = new
+                    next_id += 1
+            elif action == 2:  # removals
+                for b in rng.sample(sorted(loans), 10):
+                    del loans[b]
+            else:              # threshold change
+                threshold = rng.choice((50.0, 100.0, 150.0, 250.0))
+            curve = _curve(rate)
+            m.update(LoanBatch.from_rows(list(loans.values())), curve, threshold)
+            stored = {r['borrower_id']: r['refi_alert'] for r in m.alerts()}
+            assert stored == _recompute(loans, curve, threshold), f'step {step}'
+    finally:
+        m.close()
+
+def test_reapplying_the_same_run_changes_nothing(tmp_path):
+    rng = random.Random(11)
+    loans = [_loan(i, rng) for i in range(50)]
+    m = RefiMonitor(str(tmp_path / 'refi.sqlite'))
+    try:
+        first = m.update(LoanBatch.from_rows(loans), _curve(0.05))
+        again = m.update(LoanBatch.from_rows(loans), _curve(0.05))
+    finally:
+        m.close()
+    assert len(first['changes']) == len(loans)
+    assert again['changes'] == [] and again['evaluated'] == 0
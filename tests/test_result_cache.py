@@ -0,0 +1,36 @@
+import os
+import pytest
+from agent_platform.cache import DiskCache, ResultCache
+
+def test_overwriting_a_key_does_not_grow_the_byte_count(tmp_path):
+    c = DiskCache(str(tmp_path / 'c'), max_bytes=1000)
+    for _ in range(50):
+        c.put('ab' + '0' * 14, b'x' * 100)
+    assert c.stats()['bytes'] == 100 and c.evictions == 0
+    c.put('cd' + '1' * 14, b'y' * 50)
+    assert c.stats()['bytes'] == 150
+
+def test_eviction_trims_least_recently_used(tmp_path):
+    c = DiskCache(str(tmp_path / 'c'), max_bytes=1000)
+    keys = [f'{i:02d}' + '0' * 14 for i in range(12)]
+    for k in keys:
+        c.put(k, b'x' * 100)
+    assert c.stats()['bytes'] <= 1000 and c.evictions > 0
+    assert c.get(keys[-1]) == b'x' * 100 and c.get(keys[0]) is None
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='POSIX permissions')
+def test_shared_writable_directory_is_refused(tmp_path):
+    directory = tmp_path / 'c'
+    DiskCache(str(directory))
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+    os.chmod(directory, 0o777)
+    with pytest.raises(ValueError):
+        DiskCache(str(directory))
+
+def test_disk_tier_survives_a_new_process_cache(tmp_path):
+    first = ResultCache('g', 'v1', directory=str(tmp_path))
+    assert first.call(lambda p: {'out': p['x'] * 2}, {'x': 2}) == {'out': 4}
+    second = ResultCache('g', 'v1', directory=str(tmp_path))
+    assert second.call(lambda p: pytest.fail('recomputed'), {'x': 2}) == {'out': 4}
+    other = ResultCache('g', 'v2', directory=str(tmp_path))
+    assert other.call(lambda p: {'out': 0}, {'x': 2}) == {'out': 0}
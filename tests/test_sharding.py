@@ -0,0 +1,79 @@
+import json, os, random, signal, subprocess, sys, time
+from functools import partial
+import usecases.mortgage_prequal_advisor.module as prequal
+from agent_platform.orchestration import ParallelExecutor
+from agent_platform.sharding import ShardQueue, job_id, run_sharded
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+N_SHARDS = 8
+
+# a worker process whose shards take long enough to be killed mid-run
+SLOW_WORKER = """
+import sys, time
+from functools import partial
+import usecases.mortgage_prequal_advisor.module as prequal
+from agent_platform.sharding import run_sharded
+
+def slow(shard, part, n_shards, data_path):
+    time.sleep(0.5)
+    prequal.run_shard(shard, part, n_shards, data_path=data_path)
+
+data, workdir, n_shards = sys.argv[1], sys.argv[2], int(sys.argv[3])
+run_sharded('b', [data], partial(slow, data_path=data), None, n_shards, workdir, role='worker')
+"""
+
+def _borrowers(path: str, n: int = 600):
+    rng = random.Random(5)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n):
+            f.write(json.dumps({
+                'borrower_id': f'b{i}', 'income_monthly': rng.randint(3000, 20000), 'debts_monthly': rng.randint(0, 4000),
+                'fico': rng.randint(550, 820), 'home_price': rng.randint(150000, 900000),
+                'down_payment': rng.randint(5000, 200000),
+            }) + '\n')
+
+def _read(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def _unsharded(tmp_path, data: str) -> str:
+    prequal.run(str(tmp_path / 'ref'), data_path=data, echo='none')
+    return _read(tmp_path / 'ref' / 'b_prequal.json')
+
+def _sharded(data: str, workdir: str, out_dir: str, executor=None, workers: int = 1):
+    merge = partial(prequal.merge_shards, output_dir=out_dir, echo='none')
+    run_sharded('b', [data], partial(prequal.run_shard, data_path=data), merge, N_SHARDS, workdir,
+                executor=executor, workers=workers)
+    return _read(os.path.join(out_dir, 'b_prequal.json'))
+
+def test_two_processes_merge_to_unsharded_output(tmp_path):
+    data = str(tmp_path / 'borrowers.jsonl')
+    _borrowers(data)
+    executor = ParallelExecutor('process', max_workers=2)
+    assert _sharded(data, str(tmp_path / 'shards'), str(tmp_path / 'out'), executor, 2) == _unsharded(tmp_path, data)
+
+def test_resumes_after_a_killed_worker(tmp_path):
+    data = str(tmp_path / 'borrowers.jsonl')
+    _borrowers(data)
+    workdir = str(tmp_path / 'shards')
+    job = job_id('b', [data], N_SHARDS)
+    proc = subprocess.Popen([sys.executable, '-c', SLOW_WORKER, data, workdir, str(N_SHARDS)], cwd=ROOT)
+    q = ShardQueue(os.path.join(workdir, 'queue.sqlite'))
+    try:
+        deadline = time.time() + 60
+        while not q.status(job)['done']:
+            assert proc.poll() is None and time.time() < deadline, 'worker did not finish a shard'
+            time.sleep(0.05)
+        proc.send_signal(signal.SIGKILL)
+        proc.wait()
+        status = q.status(job)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        q.close()
+    assert 0 < status['done'] < N_SHARDS
+
+    # the killed worker's running shard is reclaimed at once (its pid is gone), not after the lease
+    merged = _sharded(data, workdir, str(tmp_path / 'out'))
+    assert merged == _unsharded(tmp_path, data)
@@ -1,23 +1,41 @@
 # Minimal LangGraph graph that wraps your existing functions
-from typing import Dict, Any
-from langgraph.graph import StateGraph
-from agent_platform.tools import load_transactions_csv, budget_insights, categorize
+import sys
+from functools import lru_cache
+from typing import Dict, Any, List
+from agent_platform.tools import load_transactions_csv, budget_insights, categorize_many, categorize_version
+from agent_platform.orchestration import build_state_graph, cached_graph
+from agent_platform.cache import result_cache
 
 def _classify_node(state: Dict[str, Any]) -> Dict[str, Any]:
     txs = state["transactions"]
-    for t in txs:
-        if not t.category:
-            t.category = categorize(t)
+    pending = [t for t in txs if not t.category]
+    for t, cat in zip(pending, categorize_many(pending)):
+        t.category = cat
     return {"transactions": txs}
 
 def _report_node(state: Dict[str, Any]) -> Dict[str, Any]:
     return {"insights": budget_insights(state["transactions"])}
 
+NODES = (("classify", _classify_node), ("report", _report_node))
+
+@lru_cache(maxsize=None)
+def _version() -> str:
+    return categorize_version(sys.modules[__name__])
+
+def _cache(name: str = "transactions"):
+    # opt-in via $AGENT_PLATFORM_RESULT_CACHE; batch_invoke results have their own entries
+    return result_cache(name, _version())
+
+def batch_invoke(states: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    cache = _cache("transactions-batch")
+    return cache.map(_batch_invoke, states) if cache is not None else _batch_invoke(states)
+
+def _batch_invoke(states: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # micro-batched path: one categorize_many over every request's pending transactions
+    pending = [t for s in states for t in s["transactions"] if not t.category]
+    for t, cat in zip(pending, categorize_many(pending)):
+        t.category = cat
+    return [{**s, "insights": budget_insights(s["transactions"])} for s in states]
+
 def build_graph():
-    sg = StateGraph(dict)
-    sg.add_node("classify", _classify_node)
-    sg.add_node("report", _report_node)
-    sg.set_entry_point("classify")
-    sg.add_edge("classify", "report")
-    sg.set_finish_point("report")
-    return sg.compile()
+    return cached_graph(build_state_graph(NODES), _cache())
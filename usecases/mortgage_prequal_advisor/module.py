@@ -1,61 +1,99 @@
-import os, json
-from agent_platform.schemas import BorrowerProfile
-from agent_platform.tools import compute_dti, compute_ltv, max_loan_estimate, policy_check
-from agent_platform.orchestration import SimpleGraph
-from agent_platform.utils import dump_json
-
-def run(output_dir: str):
-    data_path = os.path.join(os.path.dirname(__file__), 'data', 'borrowers.jsonl')
-    with open(data_path, 'r', encoding='utf-8') as f:
-        profiles = [BorrowerProfile(**json.loads(l)) for l in f]
-
-    def planner_node(payload):
-        p = payload['profile']
-        calc = {
-            'dti': compute_dti(p),
-            'ltv': compute_ltv(p),
-            'max_loan': max_loan_estimate(p),
-        }
-        # keep both profile and calc in the payload
-        return {'profile': p, 'calc': calc}
-
-    def compliance_node(payload):
-        p = payload['profile']
-        # be robust: if calc got dropped upstream, recompute it
-        calc = payload.get('calc')
-        if calc is None:
-            calc = {
-                'dti': compute_dti(p),
-                'ltv': compute_ltv(p),
-                'max_loan': max_loan_estimate(p),
-            }
-        res = policy_check(p)
-        return {
-            'profile': p,
-            'calc': calc,
-            'policy_flags': res['flags'],
-            'docs': res['docs'],
+import os, sys
+from typing import List, Optional
+from agent_platform.tools import (
+    DEFAULT_CHUNK_SIZE, REQUIRED_DOCS, iter_borrower_batches, load_borrower_batch, PrequalContext,
+    policy_flags, prequal_batch, prequal_version
+)
+from agent_platform.orchestration import SimpleGraph, ParallelExecutor
+from agent_platform.output import NDJSONWriter, open_writer
+from agent_platform.cache import ResultCache, result_cache
+from agent_platform.sharding import merge_parts, shard_rows
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), 'data', 'borrowers.jsonl')
+
+def planner_node(payload):
+    p = payload['profile']
+    # the payload only carries plain values; compliance works from 'calc'
+    return {'profile': p, 'calc': PrequalContext(p).calc()}
+
+def planner_batch(payloads):
+    profiles = [x['profile'] for x in payloads]
+    b = prequal_batch(profiles)
+    calcs = zip(b['dti'].tolist(), b['ltv'].tolist(), b['max_loan'].tolist())
+    return [
+        {'profile': p, 'calc': {'dti': dti, 'ltv': ltv, 'max_loan': max_loan}}
+        for p, (dti, ltv, max_loan) in zip(profiles, calcs)
+    ]
+
+def compliance_node(payload):
+    p = payload['profile']
+    # be robust: if calc got dropped upstream, recompute it
+    calc = payload.get('calc') or PrequalContext(p).calc()
+    return {
+        'profile': p,
+        'calc': calc,
+        'policy_flags': policy_flags(calc['dti'], calc['ltv'], p.fico),
+        'docs': list(REQUIRED_DOCS),
+    }
+
+def compliance_batch(payloads):
+    return [
+        {
+            'profile': x['profile'],
+            'calc': x['calc'],
+            'policy_flags': policy_flags(x['calc']['dti'], x['calc']['ltv'], x['profile'].fico),
+            'docs': list(REQUIRED_DOCS),
         }
+        for x in payloads
+    ]
+
+def build_graph(cache: Optional[ResultCache] = None) -> SimpleGraph:
+    return (
+        SimpleGraph(cache)
+        .add(planner_node, batch=planner_batch)        # adds 'calc'
+        .add(compliance_node, batch=compliance_batch)  # consumes 'calc'
+    )
+
+def graph_cache(spec: Optional[str] = None) -> Optional[ResultCache]:
+    # spec: 'memory' or a directory (default $AGENT_PLATFORM_RESULT_CACHE); None when off
+    return result_cache('prequal', prequal_version(sys.modules[__name__]), spec)
+
+def run(output_dir: str, chunk_size: int = DEFAULT_CHUNK_SIZE, executor: Optional[ParallelExecutor] = None,
+        data_path: str = DATA_PATH, output_format: str = 'json', echo: str = 'full', cache_spec: Optional[str] = None):
+    g = build_graph(graph_cache(cache_spec))
+
+    # validated columns come from the column cache; models are built without revalidation
+    payloads = (
+        {'profile': p}
+        for batch in iter_borrower_batches(data_path, chunk_size)
+        for p in batch.to_models()
+    )
+    # results are written as the graph yields them
+    with open_writer(output_dir, 'b_prequal', output_format, echo, key='results') as w:
+        for out in g.stream(payloads, chunk_size=chunk_size, executor=executor):
+            w.write(_result(out))
+
+def _result(out) -> dict:
+    return {
+        'borrower_id': out['profile'].borrower_id,
+        'calc': out['calc'],
+        'policy_flags': out['policy_flags'],
+        'docs': out['docs'],
+    }
+
+def run_shard(shard: int, part_path: str, n_shards: int, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              data_path: str = DATA_PATH):
+    # one borrower_id shard; each result keeps its input row so the merge restores file order
+    batch = load_borrower_batch(data_path)
+    rows = shard_rows(batch.borrower_id, shard, n_shards)
+    payloads = ({'profile': p} for p in batch[rows].to_models())
+    with NDJSONWriter(part_path) as w:
+        for row, out in zip(rows.tolist(), build_graph().stream(payloads, chunk_size=chunk_size)):
+            w.write({'_row': row, **_result(out)})
 
-    results = []
-    for p in profiles:
-        g = (
-            SimpleGraph()
-            .add(lambda _: {'profile': p})  # start
-            .add(planner_node)              # adds 'calc'
-            .add(compliance_node)           # consumes 'calc'
-        )
-        out = g.run({'profile': p})
-        results.append({
-            'borrower_id': p.borrower_id,
-            'calc': out['calc'],
-            'policy_flags': out['policy_flags'],
-            'docs': out['docs'],
-        })
-
-    os.makedirs(output_dir, exist_ok=True)
-    dump_json(os.path.join(output_dir, 'b_prequal.json'), {'results': results})
-    print(json.dumps({'results': results}, indent=2))
+def merge_shards(part_paths: List[str], output_dir: str, output_format: str = 'json', echo: str = 'full'):
+    with open_writer(output_dir, 'b_prequal', output_format, echo, key='results') as w:
+        w.write_many(merge_parts(part_paths))
 
 if __name__ == '__main__':
     run(output_dir=os.path.join('outputs','b'))
@@ -1,25 +1,45 @@
-from typing import Dict, Any
-from langgraph.graph import StateGraph
-from agent_platform.tools import compute_dti, compute_ltv, max_loan_estimate, policy_check
+import sys
+from functools import lru_cache
+from typing import Dict, Any, List
+from agent_platform.tools import (
+    REQUIRED_DOCS, PrequalContext, policy_flags, prequal_batch, policy_flags_batch, prequal_version
+)
+from agent_platform.orchestration import build_state_graph, cached_graph
+from agent_platform.cache import result_cache
 
 def _planner_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    # only serializable values go into the graph state
     p = state["profile"]
-    return {"profile": p, "calc": {
-        "dti": compute_dti(p),
-        "ltv": compute_ltv(p),
-        "max_loan": max_loan_estimate(p),
-    }}
+    return {"profile": p, "calc": PrequalContext(p).calc()}
 
 def _compliance_node(state: Dict[str, Any]) -> Dict[str, Any]:
     p = state["profile"]
-    res = policy_check(p)
-    return {"profile": p, "calc": state["calc"], "policy_flags": res["flags"], "docs": res["docs"]}
+    calc = state["calc"]
+    flags = policy_flags(calc["dti"], calc["ltv"], p.fico)
+    return {"profile": p, "calc": calc, "policy_flags": flags, "docs": list(REQUIRED_DOCS)}
+
+NODES = (("planner", _planner_node), ("compliance", _compliance_node))
+
+@lru_cache(maxsize=None)
+def _version() -> str:
+    return prequal_version(sys.modules[__name__])
+
+def _cache(name: str = "mortgage-prequal"):
+    # opt-in via $AGENT_PLATFORM_RESULT_CACHE; batch_invoke results have their own entries
+    return result_cache(name, _version())
+
+def batch_invoke(states: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    cache = _cache("mortgage-prequal-batch")
+    return cache.map(_batch_invoke, states) if cache is not None else _batch_invoke(states)
+
+def _batch_invoke(states: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # micro-batched path: one prequal_batch call instead of a PrequalContext per profile
+    b = prequal_batch([s["profile"] for s in states])
+    calcs = zip(b["dti"].tolist(), b["ltv"].tolist(), b["max_loan"].tolist())
+    return [
+        {**s, "calc": {"dti": dti, "ltv": ltv, "max_loan": max_loan}, "policy_flags": flags, "docs": list(REQUIRED_DOCS)}
+        for s, (dti, ltv, max_loan), flags in zip(states, calcs, policy_flags_batch(b))
+    ]
 
 def build_graph():
-    sg = StateGraph(dict)
-    sg.add_node("planner", _planner_node)
-    sg.add_node("compliance", _compliance_node)
-    sg.set_entry_point("planner")
-    sg.add_edge("planner", "compliance")
-    sg.set_finish_point("compliance")
-    return sg.compile()
+    return cached_graph(build_state_graph(NODES), _cache())
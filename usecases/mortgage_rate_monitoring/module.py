@@ -1,38 +1,139 @@
 import os, json
-from agent_platform.schemas import LoanInfo, RateInfo
-from agent_platform.tools import load_loans_jsonl, load_rates_jsonl
+from typing import List, Optional
+import numpy as np
+from agent_platform.tools import DEFAULT_CHUNK_SIZE, iter_loan_batches, load_loan_batch, rate_curve, refi_sweep
 from agent_platform.agents import RateRetrieverAgent, SavingsCalculatorAgent, AlertAgent
-from agent_platform.orchestration import SimpleGraph
-from agent_platform.utils import dump_json
-
-def run(output_dir: str, threshold: float = 150.0):
-    base = os.path.dirname(__file__)
-    loans_path = os.path.join(base, 'data', 'loans.jsonl')
-    rates_path = os.path.join(base, 'data', 'rates.jsonl')
-
-    loans = load_loans_jsonl(loans_path)
-    rates = load_rates_jsonl(rates_path)
-
-    rate_agent = RateRetrieverAgent('rate_retriever', tools_allowed=['load_rates'])
-    savings_agent = SavingsCalculatorAgent('savings', tools_allowed=['calculate_savings'])
-    alert_agent = AlertAgent('alert', tools_allowed=['should_alert'])
-
-    g = (
-        SimpleGraph()
-        .add(lambda _: {'rates': rates, 'term_months': None})
-        .add(rate_agent.run)
-        .add(lambda x: {'loans': loans, 'market_rate': x['market_rate']})
-        .add(savings_agent.run)
-        .add(lambda x: {'savings': x['savings'], 'threshold': threshold})
-        .add(alert_agent.run)   
+from agent_platform.orchestration import DagGraph, ParallelExecutor
+from agent_platform.monitoring import RefiMonitor
+from agent_platform.registries import load_agents
+from agent_platform.runtime import AGENTS_PATH
+from agent_platform.output import NDJSONWriter, open_writer
+from agent_platform.sharding import merge_parts, shard_rows
+
+LOANS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'loans.jsonl')
+RATES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'rates.jsonl')
+
+def _rates_node(x):
+    # shared across runs; re-read only when the rates file changes
+    return {'rates': rate_curve(x['rates_path'])}
+
+def _loans_node(x):
+    return {'loans': load_loan_batch(x['loans_path'])}
+
+def build_graph(rate_agent, savings_agent, alert_agent, executor: Optional[ParallelExecutor] = None) -> DagGraph:
+    return (
+        DagGraph(executor)
+        .add('rates', _rates_node, reads=['rates_path'], writes=['rates'])
+        .add('loans', _loans_node, reads=['loans_path'], writes=['loans'])
+        .add('market_rate', rate_agent.run, reads=['rates', 'term_months'], writes=['market_rate'])
+        .add('savings', savings_agent.run, reads=['loans', 'market_rate'], writes=['savings'])
+        .add('alerts', alert_agent.run, reads=['savings', 'threshold'], writes=['alerts'])
+    )
+
+def run(output_dir: str, threshold: float = 150.0, chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE,
+        executor: Optional[ParallelExecutor] = None, loans_path: str = LOANS_PATH, rates_path: str = RATES_PATH,
+        output_format: str = 'json', echo: str = 'full', state_path: Optional[str] = None):
+    if state_path is not None:
+        return monitor(output_dir, state_path, threshold, loans_path, rates_path, output_format, echo)
+    state = {
+        'rates_path': rates_path,
+        'loans_path': loans_path,
+        'term_months': None,
+        'threshold': threshold,
+    }
+
+    g = build_graph(*_agents(), executor)
+
+    # every alert is dumped once and streamed to the writer as its chunk completes
+    with open_writer(output_dir, 'c_refi_alerts', output_format, echo, key='alerts', head=_head) as w:
+        if chunk_size is None:
+            # whole book at once: rate retrieval and loan loading run side by side
+            w.write_many(a.model_dump() for a in g.run(state)['alerts'])
+        else:
+            # resolve the market rate once, then stream loan chunks; 'loans' and
+            # 'market_rate' are already present so those nodes are skipped
+            state = g.run(state, targets=['market_rate'])
+            payloads = ({**state, 'loans': loans} for loans in iter_loan_batches(state['loans_path'], chunk_size=chunk_size))
+            for chunk_out in (executor or ParallelExecutor()).map(g.run, payloads):
+                w.write_many(a.model_dump() for a in chunk_out['alerts'])
+
+def _agents():
+    # tools and memory settings come from agents.yml
+    specs = load_agents(AGENTS_PATH)
+    return (
+        RateRetrieverAgent.from_spec(specs['rate_retriever']),
+        SavingsCalculatorAgent.from_spec(specs['savings_calculator']),
+        AlertAgent.from_spec(specs['alert']),
     )
-    out = g.run({})
-    os.makedirs(output_dir, exist_ok=True)
-    dump_json(os.path.join(output_dir, 'c_refi_alerts.json'), {
-        'market_rate': out['alerts'][0].market_rate if out['alerts'] else None,
-        'alerts': [a.model_dump() for a in out['alerts']]
-    })
-    print(json.dumps({'alerts': [a.model_dump() for a in out['alerts']]}, indent=2))
+
+def _head(first: Optional[dict]) -> dict:
+    return {'market_rate': first['market_rate'] if first else None}
+
+def run_shard(shard: int, part_path: str, n_shards: int, threshold: float = 150.0,
+              loans_path: str = LOANS_PATH, rates_path: str = RATES_PATH):
+    # one borrower_id shard against the market rate of the whole rates file
+    loans = load_loan_batch(loans_path)
+    rows = shard_rows(loans.borrower_id, shard, n_shards)
+    state = {'rates_path': rates_path, 'loans': loans[rows], 'term_months': None, 'threshold': threshold}
+    alerts = build_graph(*_agents()).run(state)['alerts']
+    with NDJSONWriter(part_path) as w:
+        for row, a in zip(rows.tolist(), alerts):
+            w.write({'_row': row, **a.model_dump()})
+
+def merge_shards(part_paths: List[str], output_dir: str, output_format: str = 'json', echo: str = 'full'):
+    with open_writer(output_dir, 'c_refi_alerts', output_format, echo, key='alerts', head=_head) as w:
+        w.write_many(merge_parts(part_paths))
+
+def monitor(output_dir: str, state_path: str, threshold: float = 150.0, loans_path: str = LOANS_PATH,
+            rates_path: str = RATES_PATH, output_format: str = 'json', echo: str = 'full'):
+    # stateful mode: only new/changed loans and alerts flipped by a rate move are evaluated and written
+    m = RefiMonitor(state_path)
+    try:
+        delta = m.update(load_loan_batch(loans_path), rate_curve(rates_path), threshold)
+    finally:
+        m.close()
+    head = {k: delta[k] for k in ('market_rate', 'previous_market_rate', 'changed_terms', 'evaluated')}
+    with open_writer(output_dir, 'c_refi_changes', output_format, echo, key='changes', head=head) as w:
+        w.write_many(delta['changes'])
+    return delta
+
+def sweep(output_dir: str, thresholds=(100.0, 150.0, 250.0), chunk_size: int = DEFAULT_CHUNK_SIZE,
+          loans_path: str = LOANS_PATH, rates_path: str = RATES_PATH):
+    # every loan against the best rate of every available term, several thresholds at once
+
+    scenario_terms, scenario_rates = rate_curve(rates_path).curve(how='best')
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    labels = [f'{t:g}' for t in thresholds]
+
+    flagged = np.zeros(len(thresholds), dtype=np.int64)
+    n = 0
+    with NDJSONWriter(os.path.join(output_dir, 'c_refi_sweep.jsonl')) as w:
+        for loans in iter_loan_batches(loans_path, chunk_size=chunk_size):
+            best, savings = refi_sweep(
+                loans.loan_balance, loans.current_rate, loans.remaining_term_months,
+                scenario_terms, scenario_rates,
+            )
+            hits = savings[:, None] >= thresholds[None, :]
+            flagged += hits.sum(axis=0)
+            n += len(loans)
+            rows = zip(loans.borrower_id.tolist(), loans.current_rate.tolist(), best.tolist(), savings.tolist(), hits.tolist())
+            for borrower_id, current_rate, b, sv, row in rows:
+                w.write({
+                    'borrower_id': borrower_id,
+                    'current_rate': current_rate,
+                    'term_months': int(scenario_terms[b]),
+                    'market_rate': float(scenario_rates[b]),
+                    'monthly_savings': sv,
+                    'refi_alert': {k: 'Yes' if h else 'No' for k, h in zip(labels, row)},
+                })
+
+    summary = {
+        'loans': n,
+        'scenarios': [{'term_months': int(t), 'rate': float(r)} for t, r in zip(scenario_terms, scenario_rates)],
+        'flagged': dict(zip(labels, flagged.tolist())),
+    }
+    print(json.dumps(summary, indent=2))
+    return summary
 
 if __name__ == '__main__':
     run(output_dir=os.path.join('outputs','c'))
@@ -1,31 +1,46 @@
-from typing import Dict, Any, List
-from langgraph.graph import StateGraph
-from agent_platform.tools import load_loans_jsonl, load_rates_jsonl, calculate_savings, should_alert
-
-def _rate_node(state: Dict[str, Any]) -> Dict[str, Any]:
-    rates = state["rates"]
-    term = state.get("term_months")
-    if term:
-        candidates = [r["rate"] if isinstance(r, dict) else r.rate for r in rates if (r["term_months"] if isinstance(r, dict) else r.term_months) == term]
-        market_rate = min(candidates) if candidates else min(r["rate"] if isinstance(r, dict) else r.rate for r in rates)
-    else:
-        market_rate = min(r["rate"] if isinstance(r, dict) else r.rate for r in rates)
-    return {"market_rate": market_rate}
+from typing import Dict, Any, List, Optional
+import numpy as np
+from agent_platform.tools import (
+    load_loans_jsonl, load_rates_jsonl, calculate_savings_batch, should_alert, RateCurve, rate_curve
+)
+from agent_platform.orchestration import build_state_graph
+
+def _curve(state: Dict[str, Any], memo: Optional[dict] = None) -> RateCurve:
+    # "rates" may be a RateCurve, or RateInfo/dict rows; without it the shared curve for "rates_path" is used
+    rates = state.get("rates")
+    if rates is None:
+        return rate_curve(state["rates_path"])
+    if isinstance(rates, RateCurve):
+        return rates
+    if memo is None:
+        return RateCurve.from_rates(rates)
+    curve = memo.get(id(rates))
+    if curve is None:
+        curve = memo[id(rates)] = RateCurve.from_rates(rates)
+    return curve
+
+def _rate_node(state: Dict[str, Any], memo: Optional[dict] = None) -> Dict[str, Any]:
+    curve = _curve(state, memo)
+    return {"market_rate": curve.market_rate(state.get("term_months"), state.get("as_of"))}
+
+def _field(row: Any, key: str) -> Any:
+    # allow dict or pydantic model
+    return row[key] if isinstance(row, dict) else getattr(row, key)
 
 def _savings_node(state: Dict[str, Any]) -> Dict[str, Any]:
     loans = state["loans"]
     mr = state["market_rate"]
-    out = []
-    for loan in loans:
-        # allow dict or pydantic model
-        lb = loan["loan_balance"] if isinstance(loan, dict) else loan.loan_balance
-        cr = loan["current_rate"] if isinstance(loan, dict) else loan.current_rate
-        tm = loan["remaining_term_months"] if isinstance(loan, dict) else loan.remaining_term_months
-        # quick inline monthly payment delta (reuse of calculate_savings is fine if you convert)
-        from agent_platform.schemas import LoanInfo
-        li = LoanInfo(borrower_id=(loan["borrower_id"] if isinstance(loan, dict) else loan.borrower_id),
-                      loan_balance=lb, current_rate=cr, remaining_term_months=tm)
-        out.append({"borrower_id": li.borrower_id, "current_rate": cr, "market_rate": mr, "monthly_savings": calculate_savings(li, mr)})
+    current_rates = [_field(l, "current_rate") for l in loans]
+    savings = calculate_savings_batch(
+        [_field(l, "loan_balance") for l in loans],
+        current_rates,
+        [_field(l, "remaining_term_months") for l in loans],
+        mr,
+    )
+    out = [
+        {"borrower_id": _field(l, "borrower_id"), "current_rate": cr, "market_rate": mr, "monthly_savings": s}
+        for l, cr, s in zip(loans, current_rates, savings.tolist())
+    ]
     return {"savings": out}
 
 def _alert_node(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -41,13 +56,35 @@ def _alert_node(state: Dict[str, Any]) -> Dict[str, Any]:
         })
     return {"alerts": alerts}
 
+NODES = (("rate", _rate_node), ("savings", _savings_node), ("alert", _alert_node))
+
+def batch_invoke(states: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # micro-batched path: every request's loans go through one calculate_savings_batch,
+    # with the market rate and threshold broadcast per loan
+    memo = {}  # requests usually share one rates list; build its curve once per batch
+    market_rates = [_rate_node(s, memo)["market_rate"] for s in states]
+    counts = [len(s["loans"]) for s in states]
+    loans = [l for s in states for l in s["loans"]]
+    current_rates = [_field(l, "current_rate") for l in loans]
+    savings = calculate_savings_batch(
+        [_field(l, "loan_balance") for l in loans],
+        current_rates,
+        [_field(l, "remaining_term_months") for l in loans],
+        np.repeat(np.asarray(market_rates, dtype=np.float64), counts),
+    )
+    thresholds = np.repeat(np.asarray([s.get("threshold", 150.0) for s in states], dtype=np.float64), counts)
+    alerts = (savings >= thresholds).tolist()
+    savings = savings.tolist()
+    out, start = [], 0
+    for s, mr, n in zip(states, market_rates, counts):
+        rows = [
+            {"borrower_id": _field(l, "borrower_id"), "current_rate": cr, "market_rate": mr, "monthly_savings": v}
+            for l, cr, v in zip(loans[start:start + n], current_rates[start:start + n], savings[start:start + n])
+        ]
+        flagged = [dict(r, refi_alert="Yes" if a else "No") for r, a in zip(rows, alerts[start:start + n])]
+        out.append({**s, "market_rate": mr, "savings": rows, "alerts": flagged})
+        start += n
+    return out
+
 def build_graph():
-    sg = StateGraph(dict)
-    sg.add_node("rate", _rate_node)
-    sg.add_node("savings", _savings_node)
-    sg.add_node("alert", _alert_node)
-    sg.set_entry_point("rate")
-    sg.add_edge("rate", "savings")
-    sg.add_edge("savings", "alert")
-    sg.set_finish_point("alert")
-    return sg.compile()
+    return build_state_graph(NODES)
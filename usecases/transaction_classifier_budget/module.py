@@ -1,37 +1,75 @@
-import os, json
-from agent_platform.tools import load_transactions_csv, budget_insights, categorize
-from agent_platform.schemas import Transaction
-from agent_platform.orchestration import SimpleGraph
-from agent_platform.utils import dump_json
-
-def run(output_dir: str):
-    data_path = os.path.join(os.path.dirname(__file__), 'data', 'transactions_sample.csv')
-    txs = load_transactions_csv(data_path)
-
-    def classify_node(payload):
-        txs = payload['transactions']
-        out = []
-        for t in txs:
-            if not t.category:
-                t.category = categorize(t)
-            out.append(t)
-        return {'transactions': out}
-
-    def report_node(payload):
-        insights = budget_insights(payload['transactions'])
-        return {'insights': insights}
-
-    g = (
-        SimpleGraph()
-        .add(lambda _: {'transactions': txs})
-        .add(classify_node)
-        .add(report_node)
-    )
-
-    result = g.run({'transactions': txs})
-    os.makedirs(output_dir, exist_ok=True)
-    dump_json(os.path.join(output_dir, 'a_insights.json'), result)
-    print(json.dumps(result, indent=2))
+import os, json, sys
+from typing import List, Optional
+from agent_platform.tools import (
+    DEFAULT_CHUNK_SIZE, iter_transaction_batches, load_transaction_batch, budget_groups, merge_groups,
+    insights_from_groups, categorize_batch, categorize_version
+)
+from agent_platform.orchestration import SimpleGraph, ParallelExecutor
+from agent_platform.aggregates import InsightStore
+from agent_platform.cache import ResultCache, result_cache
+from agent_platform.output import open_writer, write_json
+from agent_platform.sharding import shard_rows
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), 'data', 'transactions_sample.csv')
+
+def classify_node(payload):
+    return {'transactions': categorize_batch(payload['transactions'])}
+
+def report_node(payload):
+    # partial aggregates per chunk; merged and rounded once all chunks are in
+    return {'groups': budget_groups(payload['transactions'])}
+
+def build_graph(report: bool = True, cache: Optional[ResultCache] = None) -> SimpleGraph:
+    g = SimpleGraph(cache).add(classify_node)
+    return g.add(report_node) if report else g
+
+def graph_cache(report: bool = True, spec: Optional[str] = None) -> Optional[ResultCache]:
+    # spec: 'memory' or a directory (default $AGENT_PLATFORM_RESULT_CACHE); None when off
+    name = 'budget-report' if report else 'budget-classify'
+    return result_cache(name, categorize_version(sys.modules[__name__]), spec)
+
+def run(output_dir: str, chunk_size: int = DEFAULT_CHUNK_SIZE, executor: Optional[ParallelExecutor] = None,
+        store_path: Optional[str] = None, data_path: str = DATA_PATH, output_format: str = 'json', echo: str = 'full',
+        cache_spec: Optional[str] = None):
+    # with a store, classified chunks are upserted into persisted aggregates
+    # and insights are answered from those instead of from this file alone
+    store = InsightStore(store_path) if store_path else None
+    report = store is None
+    g = build_graph(report, graph_cache(report, cache_spec))
+    executor = executor or ParallelExecutor()
+
+    groups = []
+    payloads = ({'transactions': chunk} for chunk in iter_transaction_batches(data_path, chunk_size=chunk_size))
+    for out in executor.map(g.run, payloads):
+        if store is not None:
+            store.apply(out['transactions'])
+        else:
+            groups = merge_groups(groups, out['groups'])
+
+    insights = store.insights() if store is not None else insights_from_groups(groups)
+    _write_insights(insights, output_dir, output_format, echo)
+
+def run_shard(shard: int, part_path: str, n_shards: int, data_path: str = DATA_PATH):
+    # one account_id shard -> its unrounded groups; merge_shards re-reduces them
+    batch = load_transaction_batch(data_path)
+    part = batch[shard_rows(batch.account_id, shard, n_shards)]
+    groups = build_graph().run({'transactions': part})['groups'] if len(part) else []
+    write_json(part_path, {'groups': [list(g) for g in groups]})
+
+def merge_shards(part_paths: List[str], output_dir: str, output_format: str = 'json', echo: str = 'full'):
+    groups = []
+    for path in part_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            groups = merge_groups(groups, [tuple(g) for g in json.load(f)['groups']])
+    _write_insights(insights_from_groups(groups), output_dir, output_format, echo)
+
+def _write_insights(insights, output_dir: str, output_format: str, echo: str):
+    if output_format == 'json':
+        write_json(os.path.join(output_dir, 'a_insights.json'), {'insights': insights}, echo)
+    else:
+        # record formats: one row per insight, tagged with its section
+        with open_writer(output_dir, 'a_insights', output_format, echo) as w:
+            w.write_many({'section': k, **row} for k, rows in insights.items() for row in rows)
 
 if __name__ == '__main__':
     run(output_dir=os.path.join('outputs','a'))